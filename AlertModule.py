@@ -0,0 +1,409 @@
+"""
+PyDEX-UI 告警模块
+基于增量统计 (滑动窗口求和、EWMA、流式分位数、单调队列) 的阈值规则引擎
+"""
+
+import json
+import math
+import os
+import time
+from collections import deque, namedtuple
+
+COMPARATORS = {
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+}
+
+# 规则可引用的采集项: 结果为字典 (processes为进程字典列表) 的采集项
+RULE_PROBES = ("cpu", "memory", "disk", "network", "connections", "status", "processes")
+
+# 默认规则; window为秒, 速率类字段单位为KB/s, rss为字节
+DEFAULT_RULES = (
+    {"name": "cpu-high", "probe": "cpu", "field": "percent", "stat": "mean", "window": 60,
+     "op": ">", "threshold": 90},
+    {"name": "memory-high", "probe": "memory", "field": "percent", "stat": "ewma", "window": 30,
+     "op": ">", "threshold": 90},
+    {"name": "disk-full", "probe": "disk", "field": "percent", "stat": "min", "window": 60,
+     "op": ">", "threshold": 95},
+    {"name": "disk-write-p95", "probe": "disk", "field": "write_speed", "stat": "p95", "window": 300,
+     "op": ">", "threshold": 200 * 1024},
+    {"name": "network-down-p95", "probe": "network", "field": "download_speed", "stat": "p95", "window": 300,
+     "op": ">", "threshold": 100 * 1024},
+)
+
+# 流式分位数草图的相对精度
+SKETCH_GAMMA = 1.02
+
+# 告警: 规则名称, 对象 (进程规则为"名称:pid", 否则为None), 当前统计值, 开始时间
+Alert = namedtuple("Alert", ["rule", "subject", "value", "since"])
+
+
+def default_alert_log():
+    """默认的告警日志路径"""
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "pydex-ui", "alerts.log")
+
+
+class WindowedStat:
+    """时间窗口内样本的基类, 过期样本从队首移出"""
+
+    def __init__(self, window):
+        self.window = window
+        self.samples = deque()
+
+    def add(self, timestamp, value):
+        self.samples.append((timestamp, value))
+        self._added(timestamp, value)
+        horizon = timestamp - self.window
+        samples = self.samples
+        while samples[0][0] < horizon:
+            self._expired(*samples.popleft())
+
+    def _added(self, timestamp, value):
+        pass
+
+    def _expired(self, timestamp, value):
+        pass
+
+    def breached(self, compare, threshold):
+        return compare(self.value(), threshold)
+
+
+class WindowedMean(WindowedStat):
+    """滑动窗口均值, 维护窗口内的累加和"""
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.total = 0.0
+
+    def _added(self, timestamp, value):
+        self.total += value
+
+    def _expired(self, timestamp, value):
+        self.total -= value
+
+    def value(self):
+        return self.total / len(self.samples)
+
+
+class WindowedExtreme:
+    """单调队列实现的滑动窗口最小值/最大值"""
+
+    def __init__(self, window, maximum):
+        self.window = window
+        self.maximum = maximum
+        self.queue = deque()
+
+    def add(self, timestamp, value):
+        queue = self.queue
+        if self.maximum:
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+        else:
+            while queue and queue[-1][1] >= value:
+                queue.pop()
+        queue.append((timestamp, value))
+        horizon = timestamp - self.window
+        while queue[0][0] < horizon:
+            queue.popleft()
+
+    def value(self):
+        return self.queue[0][1]
+
+    def breached(self, compare, threshold):
+        return compare(self.value(), threshold)
+
+
+class Ewma:
+    """按时间衰减的指数加权移动平均, window为时间常数"""
+
+    def __init__(self, window):
+        self.window = window
+        self.average = None
+        self.last_time = None
+
+    def add(self, timestamp, value):
+        if self.average is None:
+            self.average = value
+        else:
+            alpha = 1.0 - math.exp(-max(0.0, timestamp - self.last_time) / self.window)
+            self.average += alpha * (value - self.average)
+        self.last_time = timestamp
+
+    def value(self):
+        return self.average
+
+    def breached(self, compare, threshold):
+        return compare(self.average, threshold)
+
+
+class WindowedQuantile(WindowedStat):
+    """滑动窗口分位数
+
+    样本计入对数分桶草图 (相对误差约1%), 只在需要显示数值时遍历分桶;
+    阈值判断另行维护满足比较条件的样本数, 每个样本O(1)。
+    """
+
+    def __init__(self, window, q, compare, threshold):
+        super().__init__(window)
+        self.q = q
+        self.compare = compare
+        self.threshold = threshold
+        self.matches = 0
+        self.buckets = {}
+        self._log_gamma = math.log(SKETCH_GAMMA)
+
+    def _bucket(self, value):
+        return math.ceil(math.log(value) / self._log_gamma) if value > 0 else None
+
+    def _added(self, timestamp, value):
+        key = self._bucket(value)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if self.compare(value, self.threshold):
+            self.matches += 1
+
+    def _expired(self, timestamp, value):
+        key = self._bucket(value)
+        count = self.buckets[key] - 1
+        if count:
+            self.buckets[key] = count
+        else:
+            del self.buckets[key]
+        if self.compare(value, self.threshold):
+            self.matches -= 1
+
+    def value(self):
+        """由草图估计分位数"""
+        rank = self.q * (len(self.samples) - 1)
+        seen = self.buckets.get(None, 0)
+        if rank < seen:
+            return 0.0
+        for key in sorted(key for key in self.buckets if key is not None):
+            seen += self.buckets[key]
+            if rank < seen:
+                # 分桶 (γ^(k-1), γ^k] 的代表值, 相对误差不超过 (γ-1)/(γ+1)
+                return 2 * SKETCH_GAMMA ** key / (SKETCH_GAMMA + 1)
+        return 0.0
+
+    def breached(self, compare, threshold):
+        # 第q分位数大于阈值 <=> 大于阈值的样本占比超过1-q
+        n = len(self.samples)
+        if self.compare(math.inf, self.threshold):
+            return self.matches > (1.0 - self.q) * n
+        return self.matches >= self.q * n
+
+
+class Growth(WindowedStat):
+    """持续增长检测
+
+    用窗口内的累加和 (Σt, Σv, Σt², Σtv) 做最小二乘拟合, 返回拟合直线在整个窗口上
+    相对均值的增幅; 同时用单调队列要求窗口最小值出现在窗口开头附近。
+    样本覆盖整个窗口之前不报告增长。
+    """
+
+    # 最小值必须出现在窗口最早的这一部分内
+    SLACK = 0.1
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.minimum = WindowedExtreme(window, maximum=False)
+        self.first_time = None
+        self.sums = [0.0, 0.0, 0.0, 0.0]
+
+    def add(self, timestamp, value):
+        if self.first_time is None:
+            self.first_time = timestamp
+        self.minimum.add(timestamp, value)
+        super().add(timestamp, value)
+
+    def _added(self, timestamp, value):
+        self._accumulate(timestamp - self.first_time, value, 1.0)
+
+    def _expired(self, timestamp, value):
+        self._accumulate(timestamp - self.first_time, value, -1.0)
+
+    def _accumulate(self, t, value, sign):
+        sums = self.sums
+        sums[0] += sign * t
+        sums[1] += sign * value
+        sums[2] += sign * t * t
+        sums[3] += sign * t * value
+
+    def value(self):
+        """返回相对增幅, 未满足持续增长条件时为0"""
+        now = self.samples[-1][0]
+        if now - self.first_time < self.window:
+            return 0.0
+        min_time, minimum = self.minimum.queue[0]
+        if min_time > now - self.window * (1.0 - self.SLACK):
+            return 0.0
+
+        n = len(self.samples)
+        sum_t, sum_v, sum_tt, sum_tv = self.sums
+        variance = n * sum_tt - sum_t * sum_t
+        if n < 2 or variance <= 0 or sum_v <= 0:
+            return 0.0
+        slope = (n * sum_tv - sum_t * sum_v) / variance
+        return slope * self.window / (sum_v / n)
+
+class Rule:
+    """单条告警规则
+
+    字段: name, probe, field, stat (mean/ewma/min/max/pNN/growth), window,
+    op, threshold; process为进程名称时对每个同名进程分别统计。
+    """
+
+    def __init__(self, name, probe, field, stat="mean", window=60, op=">", threshold=0.0, process=None):
+        if probe not in RULE_PROBES:
+            raise ValueError(f"Unknown probe in rule {name}: {probe} (expected one of {', '.join(RULE_PROBES)})")
+        if op not in COMPARATORS:
+            raise ValueError(f"Unknown operator in rule {name}: {op}")
+        if probe == "processes" and not process:
+            raise ValueError(f"Process rule {name} needs a process name")
+        self.name = name
+        self.probe = probe
+        self.field = field
+        self.stat = stat
+        self.window = float(window)
+        self.op = op
+        self.compare = COMPARATORS[op]
+        self.threshold = float(threshold)
+        self.process = process
+
+        # 提前校验统计类型
+        self.make_stat()
+
+    def make_stat(self):
+        """创建该规则的增量统计对象"""
+        stat = self.stat
+        if stat == "mean":
+            return WindowedMean(self.window)
+        if stat == "ewma":
+            return Ewma(self.window)
+        if stat in ("min", "max"):
+            return WindowedExtreme(self.window, maximum=stat == "max")
+        if stat == "growth":
+            return Growth(self.window)
+        if stat.startswith("p") and stat[1:].isdigit():
+            return WindowedQuantile(self.window, int(stat[1:]) / 100, self.compare, self.threshold)
+        raise ValueError(f"Unknown statistic in rule {self.name}: {stat}")
+
+    def describe(self):
+        target = f"{self.process} " if self.process else ""
+        return f"{target}{self.field} {self.stat}/{self.window:.0f}s {self.op} {self.threshold:g}"
+
+
+def load_rules(path=None):
+    """从JSON文件 (规则字典的列表) 载入规则, 未指定时使用默认规则"""
+    specs = DEFAULT_RULES
+    if path:
+        with open(path) as f:
+            specs = json.load(f)
+    return [Rule(**spec) for spec in specs]
+
+
+class AlertEngine:
+    """告警规则引擎
+
+    规则按采集项分组, 每个样本只更新相关规则的统计 (O(1)摊还); 状态变化时
+    写入日志并发布新的firing元组, 读取方通过version判断是否需要刷新。
+    """
+
+    def __init__(self, rules=None, log_path=None):
+        self.rules = load_rules() if rules is None else list(rules)
+        self.log_path = log_path
+
+        self._by_probe = {}
+        self._by_process = {}
+        for rule in self.rules:
+            if rule.process:
+                self._by_process.setdefault(rule.process, []).append(rule)
+            else:
+                self._by_probe.setdefault(rule.probe, []).append((rule, rule.make_stat()))
+
+        # (规则名称, 对象) -> Alert; 进程规则的 (统计, 对象) 按 (规则名称, pid) 保存
+        self._active = {}
+        self._process_stats = {}
+
+        self.firing = ()
+        self.version = 0
+
+    def observe(self, probe, timestamp, result):
+        """输入一次采集结果"""
+        entries = self._by_probe.get(probe)
+        if not entries or not result:
+            return
+        for rule, stat in entries:
+            value = result.get(rule.field)
+            if value is None or value != value:
+                continue
+            stat.add(timestamp, value)
+            self._set_state(rule, None, stat, timestamp, stat.breached(rule.compare, rule.threshold))
+
+    def observe_processes(self, timestamp, processes):
+        """输入一次完整的进程扫描结果, 只处理名称与进程规则匹配的进程"""
+        if not self._by_process:
+            return
+        seen = set()
+        for proc in processes:
+            rules = self._by_process.get(proc['name'])
+            if not rules:
+                continue
+            pid = proc['pid']
+            for rule in rules:
+                value = proc.get(rule.field)
+                if value is None:
+                    continue
+                key = (rule.name, pid)
+                seen.add(key)
+                entry = self._process_stats.get(key)
+                if entry is None:
+                    entry = self._process_stats[key] = (rule.make_stat(), f"{proc['name']}:{pid}")
+                stat, subject = entry
+                stat.add(timestamp, value)
+                self._set_state(rule, subject, stat, timestamp, stat.breached(rule.compare, rule.threshold))
+
+        # 丢弃已退出进程的统计, 并解除其告警
+        for key in [key for key in self._process_stats if key not in seen]:
+            _, subject = self._process_stats.pop(key)
+            if (key[0], subject) in self._active:
+                self._resolve((key[0], subject), timestamp)
+
+    def _set_state(self, rule, subject, stat, timestamp, breached):
+        """根据判断结果更新告警状态"""
+        key = (rule.name, subject)
+        if breached:
+            if key not in self._active:
+                alert = Alert(rule.name, subject, stat.value(), timestamp)
+                self._active[key] = alert
+                self._log("FIRING", alert, rule.describe())
+                self._changed()
+        elif key in self._active:
+            self._resolve(key, timestamp, stat.value())
+
+    def _resolve(self, key, timestamp, value=None):
+        alert = self._active.pop(key)
+        if value is not None:
+            alert = alert._replace(value=value)
+        self._log("RESOLVED", alert._replace(since=timestamp), "")
+        self._changed()
+
+    def _changed(self):
+        self.firing = tuple(self._active.values())
+        self.version += 1
+
+    def _log(self, state, alert, detail):
+        """追加一行告警日志"""
+        if not self.log_path:
+            return
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(alert.since))
+        subject = f" [{alert.subject}]" if alert.subject else ""
+        line = f"{stamp} {state} {alert.rule}{subject} value={alert.value:.2f} {detail}".rstrip()
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"Error writing alert log: {e}")
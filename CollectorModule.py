@@ -0,0 +1,430 @@
+"""
+PyDEX-UI 后台采集模块
+在独立线程中执行所有psutil调用, 通过不可变快照与渲染线程交接数据
+"""
+
+import platform
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+import psutil
+
+from DiskModule import PartitionCache
+from HistoryModule import ProcessHistory
+from NetstatModule import ConnectionStats
+from ProcessModule import ProcessCache, ProcessIndex, ProcessSorter, ProcessTree, parse_filter
+from ProfilerModule import PROFILER
+
+# 采集项及默认采样间隔 (秒)
+PROBE_INTERVALS = {
+    "cpu": 0.25,
+    "memory": 0.5,
+    "disk": 1.0,
+    "mounts": 5.0,
+    "network": 1.0,
+    "connections": 5.0,
+    "processes": 2.0,
+    "status": 1.0,
+}
+PROBES = tuple(PROBE_INTERVALS)
+
+# 不参与逐设备统计的虚拟块设备
+IGNORED_DISK_PREFIXES = ("loop", "ram", "zram")
+
+# 所在标签页不可见时的间隔倍数
+HIDDEN_SLOWDOWN = 4.0
+
+# 快照: 各采集项的最新结果, versions/times记录每项的更新次数和采样时间; 发布后不再修改
+Snapshot = namedtuple("Snapshot", ["seq", "timestamp", "versions", "times", *PROBES])
+
+
+class DeviceCounters:
+    """按设备保存上一次的计数, 每个字段作为一个数组对所有设备一次性计算速率"""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.names = ()
+        self.last = None
+        self.last_time = None
+
+    def rates(self, counters, now):
+        """返回 (设备名称, [每个字段的KB/s列表]); 设备集合变化后的第一次返回None"""
+        names = tuple(sorted(counters))
+        values = [counters[name] for name in names]
+        current = [array('d', [getattr(v, field) for v in values]) for field in self.fields]
+
+        result = None
+        if names == self.names and self.last is not None and now > self.last_time:
+            scale = 1 / (now - self.last_time) / 1024
+            result = [
+                [(new - old) * scale for new, old in zip(column, last)]
+                for column, last in zip(current, self.last)
+            ]
+
+        self.names = names
+        self.last = current
+        self.last_time = now
+        return names, result
+
+
+class SystemCollector:
+    """后台系统数据采集器
+
+    每个采集项按各自的挂钟间隔调度, 任何一项完成后都会发布新快照。
+    """
+
+    def __init__(self, intervals=None, process_limit=50, store=None, alerts=None):
+        self.intervals = dict(PROBE_INTERVALS, **(intervals or {}))
+        self.process_limit = process_limit
+
+        # 可选的持久化存储和告警引擎, 只由采集线程写入
+        self.store = store
+        self.alerts = alerts
+
+        # 间隔倍数: slowdown按采集项 (标签页不可见), throttle作用于全部 (视口最小化或空闲)
+        self.slowdown = {name: 1.0 for name in PROBES}
+        self.throttle = 1.0
+
+        # 最新快照: 单个引用赋值在GIL下是原子的, 读写双方无需加锁
+        self._latest = None
+        self._retired = None
+        self._seq = 0
+        self._results = {name: None for name in PROBES}
+        self._versions = {name: 0 for name in PROBES}
+        self._times = {name: None for name in PROBES}
+        self._next_due = {name: 0.0 for name in PROBES}
+
+        # 速率计算所需的上一次计数, 在采集线程中首次采样时取得
+        self.last_net_io = None
+        self.last_net_time = None
+        self.last_disk_io = None
+        self.last_disk_time = None
+        self.disk_devices = DeviceCounters(("read_bytes", "write_bytes"))
+        self.nic_devices = DeviceCounters(("bytes_sent", "bytes_recv"))
+
+        # 分区列表只在挂载表变化时重新枚举
+        self.partition_cache = PartitionCache()
+
+        # 进程静态属性缓存
+        self.process_cache = ProcessCache()
+        self.process_sorter = ProcessSorter()
+
+        # 树形模式: 发布按ppid组织的进程树中可见的节点 (不截取前N个), 以及与默认展开状态相反的pid
+        self.tree_mode = False
+        self.process_tree = ProcessTree()
+        self.tree_toggled = frozenset()
+
+        # 前K个、固定和选中进程的历史, 界面直接读取而不再查询psutil
+        self.process_history = ProcessHistory()
+
+        # 过滤索引和当前过滤条件; 修改过滤条件只重新选择, 不重新扫描
+        self.process_index = ProcessIndex()
+        self.process_filter = None
+        self._reselect = False
+
+        self.connection_stats = ConnectionStats()
+
+        self._probes = {
+            "cpu": self.sample_cpu,
+            "memory": self.sample_memory,
+            "disk": self.sample_disk,
+            "mounts": self.sample_mounts,
+            "network": self.sample_network,
+            "connections": self.sample_connections,
+            "processes": self.sample_processes,
+            "status": self.sample_status,
+        }
+
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+
+    @property
+    def latest(self):
+        """最近一次发布的快照, 尚未采样时为None"""
+        return self._latest
+
+    def start(self):
+        """启动采集线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._thread = threading.Thread(target=self._run, name="pydex-collector")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """停止采集线程"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.store:
+            self.store.close()
+
+    def request_refresh(self, *probes):
+        """让指定采集项 (默认全部) 立即采样一次"""
+        for name in probes or PROBES:
+            self._next_due[name] = 0.0
+        self._wake_event.set()
+
+    def set_visible(self, probes):
+        """设置当前可见的采集项, 其余按HIDDEN_SLOWDOWN放慢"""
+        for name in PROBES:
+            self.slowdown[name] = 1.0 if name in probes else HIDDEN_SLOWDOWN
+
+    def _run(self):
+        """调度循环: 执行所有到期的采集项, 然后睡到下一个到期时间"""
+        # 首轮逐项发布, 界面不必等待最慢的采集项 (进程、连接) 完成; 间隔短的采集项先采
+        if self._seq == 0:
+            for name in sorted(PROBES, key=self.intervals.get):
+                if self._stop_event.is_set():
+                    return
+                self.collect((name,))
+
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            due = [name for name in PROBES if self._next_due[name] <= now]
+            if due:
+                self.collect(due)
+            if self._reselect:
+                try:
+                    self.reselect_processes()
+                except Exception as e:
+                    print(f"Error selecting processes: {e}")
+            if self.store:
+                self.store.maintain()
+
+            wait = min(self._next_due.values()) - time.monotonic()
+            if wait > 0:
+                self._wake_event.wait(wait)
+            self._wake_event.clear()
+
+    def collect(self, probes=PROBES):
+        """执行指定采集项并发布快照; 单个采集项出错时保留上一次结果, 到下一个间隔再试"""
+        for name in probes:
+            started = time.monotonic()
+            self._next_due[name] = started + self.intervals[name] * self.slowdown[name] * self.throttle
+            try:
+                with PROFILER.section(f"probe.{name}"):
+                    result = self._probes[name]()
+            except Exception as e:
+                print(f"Error sampling {name}: {e}")
+                continue
+            self._results[name] = result
+            self._versions[name] += 1
+            self._times[name] = time.time()
+            if self.store:
+                try:
+                    self.store.append(name, self._times[name], self._results[name])
+                except OSError as e:
+                    print(f"Error writing history: {e}")
+            if self.alerts and name != "processes":
+                try:
+                    self.alerts.observe(name, self._times[name], self._results[name])
+                except Exception as e:
+                    print(f"Error evaluating alerts for {name}: {e}")
+        return self._publish()
+
+    def _publish(self):
+        """发布当前结果的新快照"""
+        snapshot = Snapshot(
+            self._seq + 1,
+            time.time(),
+            dict(self._versions),
+            dict(self._times),
+            *(self._results[name] for name in PROBES),
+        )
+        self._seq = snapshot.seq
+        # 上一个快照多保留一轮: 界面换用新快照后, 大的进程列表在采集线程中释放, 不占用渲染帧
+        self._retired = self._latest
+        self._latest = snapshot
+        return snapshot
+
+    def request_reselect(self):
+        """排序或数量限制变化后, 由采集线程用现有索引重新选择进程, 不重新扫描"""
+        self._reselect = True
+        self._wake_event.set()
+
+    def set_filter(self, text):
+        """设置进程过滤表达式 (无效时抛出ValueError), 由采集线程用现有索引重新选择"""
+        self.process_filter = parse_filter(text)
+        self.request_reselect()
+
+    def toggle_tree_node(self, pid):
+        """折叠或展开进程树中的节点, 由采集线程用现有进程树重新选择"""
+        self.tree_toggled = self.tree_toggled ^ {pid}
+        self.request_reselect()
+
+    def reselect_processes(self):
+        """用最近一次扫描的索引重新选择进程并发布 (仅采集线程调用)"""
+        self._reselect = False
+        with PROFILER.section("probe.processes.filter"):
+            self._results["processes"] = self._select_processes()
+        self._versions["processes"] += 1
+        return self._publish()
+
+    def _select_processes(self):
+        """对最近一次扫描应用过滤条件, 再排序截取或输出进程树"""
+        matches = self.process_index.match(self.process_filter)
+        if self.tree_mode:
+            include = None if matches is None else self.process_tree.with_ancestors(matches)
+            return tuple(self.process_tree.rows(*self.process_sorter.order, include=include,
+                                                toggled=self.tree_toggled))
+
+        procs = self.process_index.procs
+        processes = procs.values() if matches is None else [procs[pid] for pid in matches]
+        return tuple(self.process_sorter.select(processes, self.process_limit))
+
+    def sample_cpu(self):
+        """采集CPU信息"""
+        cpu_freq = psutil.cpu_freq()
+        return {
+            "percent": psutil.cpu_percent(interval=None),
+            "count": psutil.cpu_count(),
+            "logical": psutil.cpu_count(logical=True),
+            "freq": cpu_freq.current if cpu_freq else None,
+            "percpu": psutil.cpu_percent(interval=None, percpu=True),
+        }
+
+    def sample_memory(self):
+        """采集内存信息"""
+        memory = psutil.virtual_memory()
+        return {
+            "percent": memory.percent,
+            "used": memory.used,
+            "available": memory.available,
+            "total": memory.total,
+        }
+
+    def sample_disk(self):
+        """采集磁盘信息"""
+        try:
+            disk = psutil.disk_usage('/')
+            result = {
+                "percent": disk.percent,
+                "used": disk.used,
+                "free": disk.free,
+                "total": disk.total,
+                "read_speed": None,
+                "write_speed": None,
+                "devices": None,
+            }
+
+            current_disk_io = psutil.disk_io_counters()
+            current_time = time.time()
+
+            if self.last_disk_io and current_disk_io:
+                time_diff = current_time - self.last_disk_time
+                if time_diff > 0:
+                    result["read_speed"] = (current_disk_io.read_bytes - self.last_disk_io.read_bytes) / time_diff / 1024
+                    result["write_speed"] = (current_disk_io.write_bytes - self.last_disk_io.write_bytes) / time_diff / 1024
+
+            self.last_disk_io = current_disk_io
+            self.last_disk_time = current_time
+
+            # 各磁盘的读写速率
+            perdisk = {
+                name: counters for name, counters in (psutil.disk_io_counters(perdisk=True) or {}).items()
+                if not name.startswith(IGNORED_DISK_PREFIXES)
+            }
+            names, rates = self.disk_devices.rates(perdisk, current_time)
+            if rates:
+                result["devices"] = {"names": names, "read": rates[0], "write": rates[1]}
+            return result
+
+        except Exception as e:
+            print(f"Error sampling disk info: {e}")
+            return None
+
+    def sample_mounts(self):
+        """采集所有挂载分区的使用情况"""
+        try:
+            return tuple(self.partition_cache.usage())
+        except Exception as e:
+            print(f"Error sampling partitions: {e}")
+            return None
+
+    def sample_network(self):
+        """采集网络信息"""
+        try:
+            result = {"upload_speed": None, "download_speed": None, "nics": None}
+
+            current_net_io = psutil.net_io_counters()
+            current_time = time.time()
+
+            if self.last_net_io and current_net_io:
+                time_diff = current_time - self.last_net_time
+                if time_diff > 0:
+                    result["upload_speed"] = (current_net_io.bytes_sent - self.last_net_io.bytes_sent) / time_diff / 1024
+                    result["download_speed"] = (current_net_io.bytes_recv - self.last_net_io.bytes_recv) / time_diff / 1024
+
+            self.last_net_io = current_net_io
+            self.last_net_time = current_time
+
+            # 各网卡的收发速率
+            names, rates = self.nic_devices.rates(psutil.net_io_counters(pernic=True) or {}, current_time)
+            if rates:
+                result["nics"] = {"names": names, "upload": rates[0], "download": rates[1]}
+            return result
+
+        except Exception as e:
+            print(f"Error sampling network info: {e}")
+            return None
+
+    def sample_connections(self):
+        """采集连接统计"""
+        try:
+            return self.connection_stats.sample()
+        except Exception as e:
+            print(f"Error sampling connection stats: {e}")
+            return None
+
+    def sample_processes(self):
+        """采集进程列表, 按当前排序截取前N个"""
+        try:
+            with PROFILER.section("probe.processes.sweep"):
+                processes = self.process_cache.sweep()
+            with PROFILER.section("probe.processes.index"):
+                self.process_index.update(processes)
+                if self.tree_mode:
+                    self.process_tree.update(processes)
+                    if self.tree_toggled - self.process_tree.procs.keys():
+                        self.tree_toggled = self.tree_toggled & self.process_tree.procs.keys()
+            if self.alerts:
+                self.alerts.observe_processes(time.time(), processes)
+            with PROFILER.section("probe.processes.history"):
+                self.record_process_history(processes)
+            self._reselect = False
+            with PROFILER.section("probe.processes.sort"):
+                return self._select_processes()
+
+        except Exception as e:
+            print(f"Error sampling process list: {e}")
+            return ()
+
+    def record_process_history(self, processes):
+        """为跟踪的进程记录历史, 只对这些进程读取I/O计数"""
+        history = self.process_history
+        tracked = history.tracked(processes)
+        io_counters = {}
+        for proc in tracked:
+            counters = self.process_cache.io_counters(proc['pid'])
+            if counters is not None:
+                io_counters[proc['pid']] = counters
+        history.record(time.time(), tracked, io_counters)
+
+        # 已退出的固定进程不再阻止淘汰
+        if history.pinned - self.process_index.procs.keys():
+            history.pinned = history.pinned & self.process_index.procs.keys()
+
+    def sample_status(self):
+        """采集状态栏信息"""
+        return {
+            "system": f"{platform.system()} {platform.release()}",
+            "uptime": time.time() - psutil.boot_time(),
+        }
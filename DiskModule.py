@@ -0,0 +1,229 @@
+"""
+PyDEX-UI 磁盘模块
+挂载点列表缓存 (仅在挂载表变化时刷新), 以及多线程、按mtime缓存各目录文件大小的目录大小扫描器
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+import psutil
+
+MOUNTS_FILE = "/proc/self/mounts"
+
+# 非Linux平台没有可比较的挂载表文件, 按固定间隔重新枚举
+PARTITION_REFRESH_SECONDS = 30.0
+
+# 扫描进度的发布间隔
+PUBLISH_INTERVAL = 0.25
+
+# 目录缓存的最大条目数, 超出时淘汰最早写入的目录
+MAX_CACHE_DIRS = 100000
+
+# 目录缓存条目: 目录mtime, 目录内文件大小合计, 子目录名列表
+DirEntry = namedtuple("DirEntry", ["mtime_ns", "files_size", "subdirs"])
+
+# 扫描结果: 根目录, {子目录: 大小}, 根目录内文件大小, 已扫描目录数, 是否完成, 错误数
+ScanResult = namedtuple("ScanResult", ["root", "children", "files_size", "dirs_scanned", "done", "errors"])
+
+
+def format_size(size):
+    """将字节数格式化为便于阅读的文本"""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class PartitionCache:
+    """挂载分区列表缓存"""
+
+    def __init__(self):
+        self._partitions = None
+        self._mounts_key = None
+        self._last_refresh = 0.0
+
+    def _mount_table_key(self):
+        """返回代表当前挂载表的键, 无法获取时为None"""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            with open(MOUNTS_FILE, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def partitions(self):
+        """返回分区列表, 挂载表未变化时直接复用"""
+        key = self._mount_table_key()
+        now = time.monotonic()
+        if self._partitions is not None:
+            if key is not None and key == self._mounts_key:
+                return self._partitions
+            if key is None and now - self._last_refresh < PARTITION_REFRESH_SECONDS:
+                return self._partitions
+
+        self._partitions = psutil.disk_partitions(all=False)
+        self._mounts_key = key
+        self._last_refresh = now
+        return self._partitions
+
+    def usage(self):
+        """返回各分区的使用情况"""
+        result = []
+        for part in self.partitions():
+            try:
+                usage = psutil.disk_usage(part.mountpoint)
+            except (OSError, PermissionError):
+                continue
+            result.append({
+                "mountpoint": part.mountpoint,
+                "device": part.device,
+                "fstype": part.fstype,
+                "total": usage.total,
+                "used": usage.used,
+                "free": usage.free,
+                "percent": usage.percent,
+            })
+        return result
+
+
+class DirectoryScanner:
+    """并行目录大小扫描器
+
+    每个目录由线程池中的一个任务用os.scandir扫描; 目录mtime未变化时直接复用缓存的
+    文件大小合计和子目录列表, 只需一次stat。追加写入已有文件不改变目录mtime, 这类
+    变化在refresh=True重新扫描前不会反映到合计中。缓存最多保留max_cache_dirs个目录。
+    扫描过程中按PUBLISH_INTERVAL发布部分结果, 读取方只需读取result属性; 已被取代的
+    扫描不再写入result。
+    """
+
+    def __init__(self, workers=8, one_filesystem=True, max_cache_dirs=MAX_CACHE_DIRS):
+        self.workers = workers
+        self.one_filesystem = one_filesystem
+        self.max_cache_dirs = max_cache_dirs
+        self.cache = {}
+        self.result = None
+        self._cache_lock = threading.Lock()
+
+        self._generation = 0
+        self._thread = None
+
+    def scan(self, root, refresh=False):
+        """开始扫描root, 取消正在进行的扫描; refresh为True时不使用缓存"""
+        root = os.path.abspath(root)
+        self._generation += 1
+        self.result = ScanResult(root, {}, 0, 0, False, 0)
+        self._thread = threading.Thread(
+            target=self._run, args=(root, self._generation, refresh), name="pydex-du"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def cancel(self):
+        """取消正在进行的扫描"""
+        self._generation += 1
+
+    def _scan_dir(self, path, device, refresh):
+        """扫描单个目录, 返回 (mtime_ns, 文件大小合计, 子目录名列表, 是否出错)"""
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None, 0, (), True
+
+        cached = None if refresh else self.cache.get(path)
+        if cached is not None and cached.mtime_ns == st.st_mtime_ns:
+            return cached.mtime_ns, cached.files_size, cached.subdirs, False
+
+        own_size = 0
+        subdirs = []
+        error = False
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.one_filesystem and device is not None:
+                                if entry.stat(follow_symlinks=False).st_dev != device:
+                                    continue
+                            subdirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            own_size += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        error = True
+        except OSError:
+            error = True
+        return st.st_mtime_ns, own_size, tuple(subdirs), error
+
+    def _run(self, root, generation, refresh):
+        """协调线程: 分发目录任务, 汇总部分结果, 完成后更新缓存"""
+        try:
+            device = os.stat(root).st_dev
+        except OSError:
+            self._publish(generation, ScanResult(root, {}, 0, 0, True, 1))
+            return
+
+        # 可缓存 (未出错) 的目录: path -> DirEntry; 每个目录归属的根目录子项
+        scanned = {}
+        dirs_scanned = 0
+        children = {}
+        files_size = 0
+        errors = 0
+        last_publish = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self._scan_dir, root, device, refresh): (root, None)}
+            while pending:
+                if generation != self._generation:
+                    for future in pending:
+                        future.cancel()
+                    return
+
+                done, _ = wait(pending, timeout=PUBLISH_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, top = pending.pop(future)
+                    mtime_ns, own_size, subdirs, error = future.result()
+                    dirs_scanned += 1
+                    errors += error
+                    if not error:
+                        scanned[path] = DirEntry(mtime_ns, own_size, subdirs)
+
+                    subdirs = [os.path.join(path, name) for name in subdirs]
+                    if top is None:
+                        files_size += own_size
+                        for sub in subdirs:
+                            children[sub] = 0
+                    else:
+                        children[top] += own_size
+
+                    for sub in subdirs:
+                        pending[pool.submit(self._scan_dir, sub, device, refresh)] = (sub, sub if top is None else top)
+
+                now = time.monotonic()
+                if now - last_publish >= PUBLISH_INTERVAL:
+                    last_publish = now
+                    self._publish(generation, ScanResult(root, dict(children), files_size, dirs_scanned, False, errors))
+
+        self._update_cache(scanned)
+        self._publish(generation, ScanResult(root, children, files_size, dirs_scanned, True, errors))
+
+    def _publish(self, generation, result):
+        """发布扫描结果, 扫描已被取消或取代时丢弃"""
+        if generation == self._generation:
+            self.result = result
+
+    def _update_cache(self, scanned):
+        """写入本次扫描的目录, 超出max_cache_dirs时淘汰最早写入的目录"""
+        with self._cache_lock:
+            cache = self.cache
+            for path, entry in scanned.items():
+                cache.pop(path, None)
+                cache[path] = entry
+            excess = len(cache) - self.max_cache_dirs
+            if excess > 0:
+                for path in list(islice(cache, excess)):
+                    del cache[path]
@@ -0,0 +1,327 @@
+"""
+PyDEX-UI 历史数据模块
+基于预分配array的环形缓冲区, 支持长时间窗口和按像素宽度降采样
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# 可选的历史窗口 (标签, 秒); 超过HISTORY_SECONDS的窗口需要持久化存储
+HISTORY_WINDOWS = (
+    ("1m", 60), ("10m", 600), ("1h", 3600),
+    ("6h", 6 * 3600), ("24h", 24 * 3600), ("7d", 7 * 86400),
+)
+
+# 内存中保留的历史时长 (秒)
+HISTORY_SECONDS = 4 * 3600
+
+
+def history_capacity(interval):
+    """按采样间隔计算保留HISTORY_SECONDS所需的容量"""
+    return int(HISTORY_SECONDS / interval)
+
+
+class RingBuffer:
+    """定长环形缓冲区
+
+    每个样本同时写入位置i和i+capacity, 因此任意最近n个样本
+    在底层数组中总是连续的, 可以直接返回memoryview而无需拷贝。
+    total为累计写入的样本数, 读取时可以指定截至哪个样本。
+    """
+
+    def __init__(self, capacity, typecode='d'):
+        self.capacity = capacity
+        self._data = array(typecode, bytes(array(typecode).itemsize * capacity * 2))
+        self._view = memoryview(self._data)
+        self._head = 0
+        self._count = 0
+        self.total = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        """追加一个样本, 满时覆盖最旧的样本"""
+        head = self._head
+        self._data[head] = value
+        self._data[head + self.capacity] = value
+        self._head = (head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        self.total += 1
+
+    def extend(self, values):
+        """按切片整体追加一批样本 (与缓冲区类型相同的array), 超出容量时只保留最新的部分"""
+        capacity = self.capacity
+        if len(values) > capacity:
+            values = values[-capacity:]
+        n = len(values)
+        head = self._head
+        first = min(n, capacity - head)
+        for offset in (0, capacity):
+            self._view[head + offset:head + offset + first] = values[:first]
+            self._view[offset:offset + n - first] = values[first:]
+        self._head = (head + n) % capacity
+        self._count = min(capacity, self._count + n)
+        self.total += n
+
+    def clear(self):
+        """清空缓冲区"""
+        self._head = 0
+        self._count = 0
+        self.total = 0
+
+    def last(self, n=None, total=None):
+        """返回截至第total个样本 (默认为最新) 的最近n个样本的只读视图 (按时间顺序)"""
+        capacity = self.capacity
+        if total is None:
+            total = self.total
+        available = min(total, capacity)
+        if n is None or n > available:
+            n = available
+        end = total % capacity + capacity if total >= capacity else total
+        return self._view[end - n:end]
+
+    def latest(self):
+        """返回最新样本, 缓冲区为空时为None"""
+        if not self._count:
+            return None
+        return self._data[self._head - 1 + self.capacity]
+
+
+class MetricHistory:
+    """带时间戳的多序列历史存储
+
+    completed为各序列都已写完的样本数, 在一组样本全部写入后才更新。读取都截至
+    completed, 并且最多读取capacity-1个样本, 因此写入线程追加下一组样本时,
+    其他线程读到的时间戳和各序列总是对齐的, 也不会被覆盖。
+    """
+
+    def __init__(self, series, capacity=28800, max_points=4096, typecode='d'):
+        self.series = tuple(series)
+        self.timestamps = RingBuffer(capacity)
+        self.values = {name: RingBuffer(capacity, typecode) for name in self.series}
+        self.completed = 0
+
+        # 降采样输出缓冲区, 每次复用避免重新分配
+        self._max_points = max_points
+        self._out_x = array('d', bytes(8 * max_points))
+        self._out_y = {name: array('d', bytes(8 * max_points)) for name in self.series}
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self):
+        """预分配的缓冲区总字节数"""
+        rings = [self.timestamps, *self.values.values()]
+        outputs = [self._out_x, *self._out_y.values()]
+        return sum(len(ring._data) * ring._data.itemsize for ring in rings) + sum(len(out) * 8 for out in outputs)
+
+    def append(self, timestamp, *values):
+        """追加一组样本, 顺序与series一致"""
+        self.timestamps.append(timestamp)
+        for name, value in zip(self.series, values):
+            self.values[name].append(value)
+        self.completed = self.timestamps.total
+
+    def prepend(self, timestamps, columns):
+        """在现有样本之前补入更早的一批样本 (array, columns顺序与series一致)
+
+        只保留早于现有首个样本的部分; 现有样本通常只有启动后的几个, 整体按切片拷贝。
+        """
+        current = self.timestamps.last()
+        if len(current):
+            keep = bisect_left(timestamps, current[0])
+            timestamps = timestamps[:keep]
+            columns = [column[:keep] for column in columns]
+        if not timestamps:
+            return
+
+        rings = [self.timestamps, *(self.values[name] for name in self.series)]
+        existing = [array(ring._data.typecode, ring.last().tobytes()) for ring in rings]
+        for ring, older, newer in zip(rings, [timestamps, *columns], existing):
+            ring.clear()
+            ring.extend(older)
+            ring.extend(newer)
+        self.completed = self.timestamps.total
+
+    def window_size(self, seconds, total=None):
+        """计算截至第total个样本 (默认为completed), 最近seconds秒内的样本数量"""
+        if total is None:
+            total = self.completed
+        times = self.timestamps.last(self.timestamps.capacity - 1, total)
+        if not len(times):
+            return 0
+        cutoff = times[-1] - seconds
+
+        # 时间戳单调递增, 二分查找窗口起点
+        lo, hi = 0, len(times)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if times[mid] < cutoff:
+                lo = mid + 1
+            else:
+                hi = mid
+        return len(times) - lo
+
+    def plot_data(self, seconds, width):
+        """返回适合绘制的数据 (xs, {series: ys})
+
+        样本数量不超过2*width时直接返回底层视图, 否则按像素桶做min/max降采样。
+        """
+        total = self.completed
+        n = self.window_size(seconds, total)
+        xs = self.timestamps.last(n, total)
+        buckets = max(1, min(int(width), self._max_points // 2))
+
+        if n <= buckets * 2:
+            return xs, {name: self.values[name].last(n, total) for name in self.series}
+
+        out_x = memoryview(self._out_x)
+        out_ys = {}
+        step = n / buckets
+
+        for name in self.series:
+            ys = self.values[name].last(n, total)
+            out = self._out_y[name]
+            for b in range(buckets):
+                start = int(b * step)
+                end = int((b + 1) * step)
+                chunk = ys[start:end]
+                out[2 * b] = min(chunk)
+                out[2 * b + 1] = max(chunk)
+            out_ys[name] = memoryview(out)[:buckets * 2]
+
+        for b in range(buckets):
+            start = int(b * step)
+            end = int((b + 1) * step)
+            self._out_x[2 * b] = xs[start]
+            self._out_x[2 * b + 1] = xs[end - 1]
+
+        return out_x[:buckets * 2], out_ys
+
+
+class MatrixRing:
+    """定长二维环形缓冲区: 每个样本是一行 (每个设备一列)
+
+    与RingBuffer相同的双写方式, 最近n行在内存中连续; 按行主序存放即为
+    以设备为行、时间为列的列主序矩阵, 可以直接交给热力图。
+    """
+
+    def __init__(self, capacity, columns):
+        self.capacity = capacity
+        self.columns = columns
+        self._data = array('d', bytes(8 * capacity * columns * 2))
+        self._view = memoryview(self._data)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, row):
+        """追加一行, 长度必须等于columns"""
+        if not isinstance(row, array):
+            row = array('d', row)
+        columns = self.columns
+        first = self._head * columns
+        second = (self._head + self.capacity) * columns
+        self._data[first:first + columns] = row
+        self._data[second:second + columns] = row
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def last(self, n=None):
+        """返回最近n行的只读视图, 长度为n*columns"""
+        if n is None or n > self._count:
+            n = self._count
+        end = self._head + self.capacity if self._count == self.capacity else self._head
+        return self._view[(end - n) * self.columns:end * self.columns]
+
+
+# 逐进程历史的序列: CPU %, RSS (MB), 读写速率 (KB/s), 线程数
+PROCESS_SERIES = ("cpu", "rss", "read", "write", "threads")
+
+
+class ProcessHistory:
+    """逐进程历史环形缓冲区
+
+    只为CPU占用前top_k的进程、固定的进程和当前选中的进程记录历史。
+    每个进程的缓冲区大小固定, 总量不超过max_bytes; 超出时按LRU淘汰
+    最久未更新 (已退出或不再跟踪) 的进程, 固定和选中的进程不会被淘汰。
+    由采集线程写入, 渲染线程通过plot_data只读取已完成的样本 (见MetricHistory.completed)。
+    """
+
+    def __init__(self, top_k=20, capacity=900, max_bytes=16 * 1024 * 1024, max_points=512):
+        self.top_k = top_k
+        self.capacity = capacity
+        self.max_points = max_points
+        self.pinned = set()
+        self.selected = None
+
+        # pid -> [create_time, MetricHistory, 上次I/O计数 (time, read, write)]
+        self.entries = OrderedDict()
+        self.entry_bytes = MetricHistory(PROCESS_SERIES, capacity, max_points, 'f').nbytes
+        self.max_entries = max(1, max_bytes // self.entry_bytes)
+
+    def tracked(self, processes):
+        """从一次扫描结果中选出需要记录的进程"""
+        watched = self.pinned | {self.selected}
+        result = [proc for proc in processes if proc['pid'] in watched]
+        others = (proc for proc in processes if proc['pid'] not in watched)
+        result.extend(heapq.nlargest(self.top_k, others, key=lambda proc: proc['cpu_percent'] or 0.0))
+        return result
+
+    def record(self, timestamp, processes, io_counters=None):
+        """追加一批进程的样本; io_counters为 pid -> (read_bytes, write_bytes)"""
+        io_counters = io_counters or {}
+        for proc in processes:
+            pid = proc['pid']
+            entry = self.entries.get(pid)
+            if entry is None or entry[0] != proc['create_time']:
+                entry = [proc['create_time'], MetricHistory(PROCESS_SERIES, self.capacity, self.max_points, 'f'), None]
+                self.entries[pid] = entry
+            self.entries.move_to_end(pid)
+
+            read = write = math.nan
+            counters = io_counters.get(pid)
+            if counters is not None:
+                last = entry[2]
+                if last is not None and timestamp > last[0]:
+                    elapsed = (timestamp - last[0]) * 1024
+                    read = max(0.0, (counters[0] - last[1]) / elapsed)
+                    write = max(0.0, (counters[1] - last[2]) / elapsed)
+                entry[2] = (timestamp, counters[0], counters[1])
+
+            entry[1].append(
+                timestamp,
+                proc['cpu_percent'] or 0.0,
+                (proc['rss'] or 0) / (1024 * 1024),
+                read,
+                write,
+                proc['num_threads'] or 0,
+            )
+        self._evict()
+
+    def _evict(self):
+        """超出总量时淘汰最久未更新的进程"""
+        excess = len(self.entries) - self.max_entries
+        if excess <= 0:
+            return
+        keep = self.pinned | {self.selected}
+        for pid in [pid for pid in self.entries if pid not in keep][:excess]:
+            del self.entries[pid]
+
+    def get(self, pid):
+        """返回pid的历史, 没有记录时为None"""
+        entry = self.entries.get(pid)
+        return entry[1] if entry else None
+
+    @property
+    def nbytes(self):
+        return len(self.entries) * self.entry_bytes
@@ -0,0 +1,304 @@
+"""
+PyDEX-UI 任务模块
+有界线程池中运行的命令任务: 状态和退出码表、取消和强制结束, 以及超过阈值后转存到临时文件的输出
+"""
+
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# 输出在内存中保留的上限, 超过后转存到临时文件
+SPILL_THRESHOLD = 1024 * 1024
+
+# 单个任务保留的输出上限, 超出的部分丢弃并计数
+MAX_OUTPUT_BYTES = 2 * 1024 ** 3
+
+# 分页浏览时每页的字节数, 以及为对齐到行首向后多读的字节数
+PAGE_BYTES = 64 * 1024
+PAGE_LOOKAHEAD = 4096
+
+READ_CHUNK = 64 * 1024
+
+# 取消运行中的任务时先发送SIGTERM, 超时仍未结束再强制结束
+KILL_TIMEOUT = 3.0
+
+# 保留的已结束任务数, 超出时删除最旧的任务及其输出
+MAX_FINISHED_JOBS = 100
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+KILLED = "killed"
+
+
+class OutputCapture:
+    """任务输出缓冲区
+
+    输出先写入内存, 总量超过spill_threshold后整体转存到临时文件, 之后直接追加到文件。
+    分页不需要索引: 第k页从k*page_bytes之后的第一个行首开始, 到下一页的起点结束,
+    翻页时只读取一页的字节。写入方是任务线程, 读取方是渲染线程, 用锁保护文件位置。
+    """
+
+    def __init__(self, spill_threshold=SPILL_THRESHOLD, max_bytes=MAX_OUTPUT_BYTES, page_bytes=PAGE_BYTES):
+        self.spill_threshold = spill_threshold
+        self.max_bytes = max_bytes
+        self.page_bytes = page_bytes
+        self.size = 0
+        self.dropped = 0
+
+        self._memory = bytearray()
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def spilled(self):
+        """输出是否已转存到临时文件"""
+        return self._file is not None
+
+    @property
+    def pages(self):
+        return max(1, -(-self.size // self.page_bytes))
+
+    def write(self, data):
+        """追加输出 (任务线程调用)"""
+        room = self.max_bytes - self.size
+        if len(data) > room:
+            self.dropped += len(data) - room
+            data = data[:room]
+        if not data:
+            return
+
+        with self._lock:
+            if self._file is None and self.size + len(data) > self.spill_threshold:
+                self._file = tempfile.TemporaryFile(prefix="pydex-job-")
+                self._file.write(self._memory)
+                self._memory = bytearray()
+
+            if self._file is not None:
+                self._file.seek(0, os.SEEK_END)
+                self._file.write(data)
+            else:
+                self._memory += data
+            self.size += len(data)
+
+    def read(self, offset, n):
+        """读取[offset, offset+n)的字节"""
+        with self._lock:
+            if self._file is None:
+                return bytes(self._memory[offset:offset + n])
+            self._file.flush()
+            self._file.seek(offset)
+            return self._file.read(n)
+
+    def _line_start(self, offset):
+        """offset处或之后的第一个行首; 前瞻范围内没有换行时直接返回offset"""
+        if offset <= 0 or offset >= self.size:
+            return min(max(offset, 0), self.size)
+        data = self.read(offset - 1, PAGE_LOOKAHEAD)
+        newline = data.find(b"\n")
+        return offset + newline if newline != -1 else offset
+
+    def page(self, index):
+        """返回第index页的文本"""
+        start = self._line_start(index * self.page_bytes)
+        end = self._line_start((index + 1) * self.page_bytes)
+        return self.read(start, end - start).decode("utf-8", "replace")
+
+    def close(self):
+        """释放内存和临时文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._memory = bytearray()
+
+
+class Job:
+    """一个命令任务"""
+
+    def __init__(self, job_id, command, on_output=None, on_exit=None):
+        self.id = job_id
+        self.command = command
+        self.state = QUEUED
+        self.exit_code = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.output = OutputCapture()
+
+        self.on_output = on_output
+        self.on_exit = on_exit
+        self.process = None
+        self.future = None
+        self.cancel_requested = False
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def runtime(self):
+        """运行时长 (秒), 尚未开始时为None"""
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+
+class JobManager:
+    """命令任务管理器
+
+    任务在最多workers个线程中并发运行, 其余任务排队。每个任务的子进程在独立的
+    进程组中启动, 取消或强制结束时连同其子进程一起结束。version在任务状态变化时
+    递增, 界面据此判断是否需要刷新任务表。
+    """
+
+    def __init__(self, workers=4, max_finished=MAX_FINISHED_JOBS):
+        self.workers = workers
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self.version = 0
+
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pydex-job")
+
+    def submit(self, command, on_output=None, on_exit=None):
+        """提交命令, 返回任务; on_output以每块输出字节调用, on_exit在任务结束时调用"""
+        with self._lock:
+            job = Job(self._next_id, command, on_output, on_exit)
+            self._next_id += 1
+            self.jobs[job.id] = job
+            self._trim()
+        job.future = self._pool.submit(self._run, job)
+        self._changed()
+        return job
+
+    def _changed(self):
+        """任务状态变化 (任意线程调用)"""
+        with self._lock:
+            self.version += 1
+
+    def _trim(self):
+        """删除超出保留数量的最旧的已结束任务"""
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job.id]
+            job.output.close()
+
+    def _run(self, job):
+        """工作线程: 运行命令并把输出写入任务的缓冲区"""
+        try:
+            process = subprocess.Popen(
+                job.command,
+                shell=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                start_new_session=True
+            )
+        except OSError as e:
+            self._output(job, f"Error executing command: {e}\n".encode())
+            self._finish(job, FAILED)
+            return
+
+        job.process = process
+        job.started = time.time()
+        job.state = RUNNING
+        self._changed()
+
+        # 进程启动前已请求取消
+        if job.cancel_requested:
+            self._signal(process, force=False)
+
+        try:
+            while True:
+                data = process.stdout.read1(READ_CHUNK)
+                if not data:
+                    break
+                self._output(job, data)
+        finally:
+            process.stdout.close()
+            job.exit_code = process.wait()
+
+        if job.cancel_requested:
+            self._finish(job, KILLED)
+        else:
+            self._finish(job, DONE if job.exit_code == 0 else FAILED)
+
+    def _output(self, job, data):
+        """记录一块输出并通知调用方"""
+        job.output.write(data)
+        if job.on_output:
+            job.on_output(data)
+
+    def _finish(self, job, state):
+        """记录任务结束"""
+        job.state = state
+        job.finished = time.time()
+        self._changed()
+        if job.on_exit:
+            job.on_exit(job)
+
+    def cancel(self, job_id):
+        """取消排队中的任务, 或结束运行中的任务 (先SIGTERM, 超时后强制结束)"""
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return
+        job.cancel_requested = True
+
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+            return
+        if job.process is not None:
+            self._signal(job.process, force=False)
+            timer = threading.Timer(KILL_TIMEOUT, self.kill, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+
+    def kill(self, job_id):
+        """立即强制结束运行中的任务"""
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return
+        job.cancel_requested = True
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+        elif job.process is not None:
+            self._signal(job.process, force=True)
+
+    def _signal(self, process, force):
+        """向任务的进程组 (Windows上为进程本身) 发送终止信号
+
+        shell退出后其子进程可能仍在组内并占用输出管道, 因此POSIX上总是按进程组发送。
+        """
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+            elif process.poll() is None:
+                if force:
+                    process.kill()
+                else:
+                    process.terminate()
+        except ProcessLookupError:
+            pass
+        except PermissionError as e:
+            print(f"Error signalling job process {process.pid}: {e}")
+
+    @property
+    def running(self):
+        """运行中的任务数"""
+        return sum(1 for job in self.jobs.values() if job.state == RUNNING)
+
+    def shutdown(self):
+        """强制结束所有任务并停止线程池"""
+        for job_id in list(self.jobs):
+            self.kill(job_id)
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,259 @@
+"""
+PyDEX-UI 日志模块
+基于mmap的大文件日志查看: 后台构建稀疏的行偏移索引, 轮询跟随追加内容, 按时间片分块的正则搜索
+"""
+
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from itertools import accumulate, count
+from operator import add
+
+# 每次建立索引处理的字节数
+INDEX_CHUNK = 4 * 1024 * 1024
+
+# 索引每隔INDEX_STRIDE行记录一个行起始偏移, 其余行从最近的记录向后查找换行符
+INDEX_STRIDE = 64
+
+# 索引追上文件末尾后检查追加和轮转的间隔 (秒)
+POLL_INTERVAL = 0.25
+
+# 单行显示的最大字符数, 超长的行截断
+MAX_LINE_CHARS = 1024
+
+# 每次搜索处理的行数, 为INDEX_STRIDE的整数倍
+SEARCH_CHUNK = 1024
+
+# 已索引的状态: 文件代数, 文件对象, mmap (空文件为None), 文件大小, 已扫描到的位置,
+# 每INDEX_STRIDE行的起始偏移, 完整的行数, 最后一行的起始偏移
+LogState = namedtuple("LogState", ["generation", "file", "mm", "size", "end", "checkpoints", "lines", "last_start"])
+
+
+class LogFile:
+    """内存映射的日志文件
+
+    后台线程按INDEX_CHUNK扫描换行符, 每INDEX_STRIDE行记录一个行起始偏移; 读到末尾后
+    按POLL_INTERVAL检查文件大小, 增长时重新映射并只扫描新增的字节, inode变化或
+    文件变短 (轮转、截断) 时重新打开并重建索引。
+
+    索引线程每次都构建新的LogState, 以单个引用赋值发布, 渲染线程每次调用只读取
+    一次state, 不会看到新旧混合的字段。checkpoints只追加, 已发布的部分不会改变。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._stop_event = threading.Event()
+        self._ino = None
+        self.state = None
+        self._open(0)
+
+        self._thread = threading.Thread(target=self._run, name="pydex-log")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _open(self, generation):
+        """打开文件并发布空索引的新状态, 失败时抛出OSError"""
+        f = open(self.path, "rb")
+        try:
+            st = os.fstat(f.fileno())
+            mm = self._map(f, st.st_size)
+        except (OSError, ValueError):
+            f.close()
+            raise
+        self._ino = st.st_ino
+        self.state = LogState(generation + 1, f, mm, len(mm) if mm is not None else 0, 0, array('q', [0]), 0, 0)
+
+    @staticmethod
+    def _map(f, size):
+        """映射整个文件; 空文件无法映射, 返回None"""
+        if size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def generation(self):
+        return self.state.generation
+
+    @property
+    def size(self):
+        return self.state.size
+
+    @property
+    def end(self):
+        return self.state.end
+
+    def close(self):
+        """停止后台线程并关闭文件"""
+        self._stop_event.set()
+        self._thread.join(timeout=1.0)
+        self.state.file.close()
+
+    def _run(self):
+        """索引线程: 扫描未索引的字节, 追上末尾后轮询文件变化"""
+        while not self._stop_event.is_set():
+            if self.state.end < self.state.size:
+                self._index_chunk()
+            elif not self._stop_event.wait(POLL_INTERVAL):
+                try:
+                    self._poll()
+                except OSError as e:
+                    print(f"Error following log {self.path}: {e}")
+                    self._stop_event.wait(POLL_INTERVAL * 4)
+
+    def _index_chunk(self):
+        """扫描一块字节, 记录其中行号为INDEX_STRIDE整数倍的行起始偏移"""
+        state = self.state
+        pos = state.end
+        end = min(state.size, pos + INDEX_CHUNK)
+        parts = state.mm[pos:end].split(b"\n")
+        parts.pop()
+        if not parts:
+            self.state = state._replace(end=end)
+            return
+
+        # 第k个换行符之后的行 (行号lines+k+1) 起始于 pos + 前k+1段长度之和 + k+1
+        starts = list(map(add, accumulate(map(len, parts)), count(pos + 1)))
+        first = -(state.lines + 1) % INDEX_STRIDE
+        state.checkpoints.extend(starts[first::INDEX_STRIDE])
+        self.state = state._replace(end=end, lines=state.lines + len(starts), last_start=starts[-1])
+
+    def _poll(self):
+        """检查文件是否增长、截断或被轮转"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            # 轮转过程中文件可能短暂不存在
+            return
+
+        state = self.state
+        if st.st_ino != self._ino or st.st_size < state.size:
+            self._open(state.generation)
+            state.file.close()
+        elif st.st_size > state.size:
+            # 映射不能扩展, 重新映射; 旧映射可能仍被渲染线程引用, 不显式关闭
+            mm = self._map(state.file, st.st_size)
+            self.state = state._replace(mm=mm, size=len(mm))
+
+    @property
+    def indexed(self):
+        """索引是否已追上文件末尾"""
+        state = self.state
+        return state.end >= state.size
+
+    def line_count(self, state=None):
+        """已索引的行数; 索引完成时包括末尾不完整的行"""
+        state = state or self.state
+        lines = state.lines
+        if state.end >= state.size and state.end > state.last_start:
+            lines += 1
+        return lines
+
+    @staticmethod
+    def line_start(state, index):
+        """第index行的起始偏移, index不超过state.lines"""
+        pos = state.checkpoints[index // INDEX_STRIDE]
+        find = state.mm.find
+        for _ in range(index % INDEX_STRIDE):
+            pos = find(b"\n", pos) + 1
+        return pos
+
+    def lines(self, start, n):
+        """读取从start开始的至多n行文本"""
+        state = self.state
+        mm = state.mm
+        if mm is None:
+            return []
+
+        result = []
+        stop = min(start + n, self.line_count(state))
+        if start >= stop:
+            return result
+        pos = self.line_start(state, start)
+        for index in range(start, stop):
+            newline = mm.find(b"\n", pos, state.end) if index < state.lines else -1
+            end = newline if newline != -1 else state.end
+            text = mm[pos:min(end, pos + MAX_LINE_CHARS)]
+            result.append(text.decode("utf-8", "replace").rstrip("\r"))
+            pos = end + 1
+        return result
+
+
+class LogSearch:
+    """分块正则搜索
+
+    每次step只在时间预算内搜索若干块 (每块SEARCH_CHUNK行), 由渲染线程逐帧调用;
+    搜索随索引推进, 跟随模式下新追加的行也会被搜索; 末尾不完整的行等写完后再搜索。
+    每行最多记录一次匹配。
+    """
+
+    def __init__(self, log, pattern, ignore_case=True):
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        self.regex = re.compile(pattern.encode("utf-8"), flags)
+        self.log = log
+        self.generation = log.generation
+        self.matches = array('q')
+        self.next_line = 0
+
+    def step(self, budget=0.004):
+        """在budget秒内继续搜索, 返回是否有新的匹配"""
+        state = self.log.state
+        if state.generation != self.generation:
+            # 文件被轮转或截断, 从头重新搜索
+            self.generation = state.generation
+            self.matches = array('q')
+            self.next_line = 0
+
+        mm = state.mm
+        if mm is None:
+            return False
+
+        regex = self.regex
+        found = len(self.matches)
+        deadline = time.perf_counter() + budget
+        while time.perf_counter() < deadline:
+            total = state.lines
+            if self.next_line >= total:
+                break
+            last = min(total, self.next_line + SEARCH_CHUNK)
+            pos = LogFile.line_start(state, self.next_line)
+            endpos = LogFile.line_start(state, last) - 1
+
+            # 从上一个位置数换行符得到匹配所在的行, 匹配后跳到下一行继续
+            line = self.next_line
+            while pos <= endpos:
+                match = regex.search(mm, pos, endpos)
+                if match is None:
+                    break
+                line += mm[pos:match.start()].count(b"\n")
+                self.matches.append(line)
+                pos = mm.find(b"\n", match.start(), endpos + 1) + 1
+                line += 1
+                if pos == 0:
+                    break
+            self.next_line = last
+        return len(self.matches) != found
+
+    @property
+    def done(self):
+        """是否已搜索到当前索引末尾"""
+        log = self.log
+        return self.next_line >= log.state.lines and log.indexed
+
+    def visible(self, start, n):
+        """返回[start, start+n)内匹配的行号集合"""
+        lo = bisect_left(self.matches, start)
+        hi = bisect_left(self.matches, start + n)
+        return set(self.matches[lo:hi])
+
+    def next_match(self, line, direction=1):
+        """返回line之后 (direction为-1时之前) 的第一个匹配行, 没有时为None"""
+        if direction > 0:
+            i = bisect_right(self.matches, line)
+            return self.matches[i] if i < len(self.matches) else None
+        i = bisect_left(self.matches, line)
+        return self.matches[i - 1] if i > 0 else None
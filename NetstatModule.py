@@ -0,0 +1,109 @@
+"""
+PyDEX-UI 连接统计模块
+流式读取/proc/net/{tcp,tcp6,udp,udp6}按状态和协议计数, 不构造逐个socket对象
+"""
+
+import os
+import re
+import socket
+import sys
+from collections import Counter
+
+import psutil
+
+# /proc/net/tcp中十六进制状态码到psutil状态名称的映射
+TCP_STATES = {
+    b"01": psutil.CONN_ESTABLISHED,
+    b"02": psutil.CONN_SYN_SENT,
+    b"03": psutil.CONN_SYN_RECV,
+    b"04": psutil.CONN_FIN_WAIT1,
+    b"05": psutil.CONN_FIN_WAIT2,
+    b"06": psutil.CONN_TIME_WAIT,
+    b"07": psutil.CONN_CLOSE,
+    b"08": psutil.CONN_CLOSE_WAIT,
+    b"09": psutil.CONN_LAST_ACK,
+    b"0A": psutil.CONN_LISTEN,
+    b"0B": psutil.CONN_CLOSING,
+    b"0C": psutil.CONN_SYN_RECV,
+}
+
+PROC_NET_FILES = (
+    ("tcp", "/proc/net/tcp"),
+    ("tcp", "/proc/net/tcp6"),
+    ("udp", "/proc/net/udp"),
+    ("udp", "/proc/net/udp6"),
+)
+
+# 每行格式: "  sl  local_address rem_address   st ...", 只捕获st列
+_STATE_RE = re.compile(rb"^\s*\d+:\s+\S+\s+\S+\s+([0-9A-F]{2})\s", re.M)
+
+CHUNK_SIZE = 1 << 20
+
+
+def count_proc_net(path):
+    """按状态码统计一个/proc/net文件中的socket数量"""
+    counts = Counter()
+    remainder = b""
+    with open(path, "rb") as f:
+        f.readline()  # 跳过表头
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            cut = chunk.rfind(b"\n") + 1
+            remainder = chunk[cut:]
+            counts.update(_STATE_RE.findall(chunk, 0, cut))
+    if remainder:
+        counts.update(_STATE_RE.findall(remainder))
+    return counts
+
+
+class ConnectionStats:
+    """连接统计采集, 调度间隔由采集器控制"""
+
+    def __init__(self, use_procfs=None):
+        if use_procfs is None:
+            use_procfs = sys.platform.startswith("linux") and os.path.exists("/proc/net/tcp")
+        self.use_procfs = use_procfs
+
+    def sample(self):
+        """立即采样一次, 返回 {"total", "states", "protocols"}"""
+        if self.use_procfs:
+            return self._sample_procfs()
+        return self._sample_psutil()
+
+    def _sample_procfs(self):
+        """Linux快速路径"""
+        states = Counter()
+        protocols = Counter()
+        for protocol, path in PROC_NET_FILES:
+            try:
+                counts = count_proc_net(path)
+            except OSError:
+                continue
+            protocols[protocol] += sum(counts.values())
+            if protocol == "tcp":
+                for code, count in counts.items():
+                    states[TCP_STATES.get(code, psutil.CONN_NONE)] += count
+        return {
+            "total": sum(protocols.values()),
+            "states": dict(states),
+            "protocols": dict(protocols),
+        }
+
+    def _sample_psutil(self):
+        """通用路径: 退回到psutil.net_connections()"""
+        states = Counter()
+        protocols = Counter()
+        for conn in psutil.net_connections():
+            if conn.type == socket.SOCK_STREAM:
+                protocols["tcp"] += 1
+                states[conn.status] += 1
+            else:
+                protocols["udp"] += 1
+        return {
+            "total": sum(protocols.values()),
+            "states": dict(states),
+            "protocols": dict(protocols),
+        }
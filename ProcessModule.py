@@ -0,0 +1,646 @@
+"""
+PyDEX-UI 进程采集模块
+按(pid, create_time)缓存进程的静态属性, 每次扫描只刷新动态字段
+"""
+
+import bisect
+import heapq
+import os
+import re
+import sys
+import time
+
+import psutil
+
+# /proc/<pid>/stat 状态字符到psutil状态名称的映射
+PROC_STATUSES = {
+    'R': psutil.STATUS_RUNNING,
+    'S': psutil.STATUS_SLEEPING,
+    'D': psutil.STATUS_DISK_SLEEP,
+    'T': psutil.STATUS_STOPPED,
+    't': psutil.STATUS_TRACING_STOP,
+    'Z': psutil.STATUS_ZOMBIE,
+    'X': psutil.STATUS_DEAD,
+    'x': psutil.STATUS_DEAD,
+    'K': "wake-kill",
+    'W': "waking",
+    'P': "parked",
+    'I': "idle",
+}
+
+
+class ProcessEntry:
+    """单个进程的缓存条目"""
+
+    __slots__ = ("pid", "create_time", "name", "username", "process", "cpu_time", "sample_time")
+
+    def __init__(self, pid, create_time, name, username, process=None):
+        self.pid = pid
+        self.create_time = create_time
+        self.name = name
+        self.username = username
+        self.process = process
+        self.cpu_time = None
+        self.sample_time = None
+
+
+class ProcessCache:
+    """增量进程采集器
+
+    name和username只在进程首次出现时解析一次; 在Linux上直接批量读取
+    /proc/<pid>/stat, 其他平台在oneshot()上下文中刷新动态字段。
+    """
+
+    def __init__(self, use_procfs=None):
+        if use_procfs is None:
+            use_procfs = sys.platform.startswith("linux") and os.path.isdir("/proc")
+        self.use_procfs = use_procfs
+
+        self.entries = {}
+
+        if self.use_procfs:
+            self._clock_ticks = os.sysconf("SC_CLK_TCK")
+            self._page_size = os.sysconf("SC_PAGE_SIZE")
+            self._boot_time = psutil.boot_time()
+
+    def sweep(self):
+        """扫描所有进程, 返回本次的进程信息列表 (每次都是新的dict)"""
+        total_memory = psutil.virtual_memory().total
+        if self.use_procfs:
+            return self._sweep_procfs(total_memory)
+        return self._sweep_psutil(total_memory)
+
+    def _resolve_static(self, pid):
+        """解析进程的静态属性, 每个进程只调用一次"""
+        try:
+            process = psutil.Process(pid)
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return None, None, None
+
+        name = username = None
+        try:
+            name = process.name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+        try:
+            username = process.username()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, KeyError):
+            pass
+        return process, name, username
+
+    def _sweep_procfs(self, total_memory):
+        """Linux快速路径: 每个进程只读取一次/proc/<pid>/stat"""
+        results = []
+        alive = set()
+        now = time.monotonic()
+
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            pid = int(name)
+
+            try:
+                with open(f"/proc/{pid}/stat", "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+
+            # comm可能包含空格和括号, 以最后一个')'为界
+            rparen = data.rfind(b")")
+            comm = data[data.find(b"(") + 1:rparen].decode(errors="replace")
+            fields = data[rparen + 2:].split()
+            starttime = int(fields[19])
+
+            entry = self.entries.get(pid)
+            if entry is None or entry.create_time != starttime:
+                _, proc_name, username = self._resolve_static(pid)
+                entry = ProcessEntry(pid, starttime, proc_name or comm, username)
+                self.entries[pid] = entry
+            alive.add(pid)
+
+            cpu_time = (int(fields[11]) + int(fields[12])) / self._clock_ticks
+            cpu_percent = 0.0
+            if entry.cpu_time is not None and now > entry.sample_time:
+                cpu_percent = max(0.0, (cpu_time - entry.cpu_time) / (now - entry.sample_time) * 100)
+            entry.cpu_time = cpu_time
+            entry.sample_time = now
+
+            rss = int(fields[21]) * self._page_size
+            results.append({
+                'pid': pid,
+                'ppid': int(fields[1]),
+                'name': entry.name,
+                'username': entry.username,
+                'status': PROC_STATUSES.get(fields[0].decode(), "?"),
+                'cpu_percent': cpu_percent,
+                'memory_percent': rss / total_memory * 100 if total_memory else 0.0,
+                'rss': rss,
+                'num_threads': int(fields[17]),
+                'create_time': self._boot_time + starttime / self._clock_ticks,
+            })
+
+        self._evict(alive)
+        return results
+
+    def _sweep_psutil(self, total_memory):
+        """通用路径: 复用psutil.Process对象, 在oneshot()中读取动态字段"""
+        results = []
+        alive = set()
+
+        for pid in psutil.pids():
+            entry = self.entries.get(pid)
+            if entry is None:
+                process, name, username = self._resolve_static(pid)
+                if process is None:
+                    continue
+                try:
+                    create_time = process.create_time()
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    create_time = None
+                entry = ProcessEntry(pid, create_time, name, username, process)
+                self.entries[pid] = entry
+
+            process = entry.process
+            try:
+                with process.oneshot():
+                    rss = process.memory_info().rss
+                    info = {
+                        'pid': pid,
+                        'ppid': process.ppid(),
+                        'name': entry.name,
+                        'username': entry.username,
+                        'status': process.status(),
+                        'cpu_percent': process.cpu_percent(interval=None),
+                        'memory_percent': rss / total_memory * 100 if total_memory else 0.0,
+                        'rss': rss,
+                        'num_threads': process.num_threads(),
+                        'create_time': entry.create_time,
+                    }
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            except psutil.AccessDenied:
+                info = {
+                    'pid': pid, 'ppid': None, 'name': entry.name, 'username': entry.username,
+                    'status': None, 'cpu_percent': None, 'memory_percent': None,
+                    'rss': None, 'num_threads': None, 'create_time': entry.create_time,
+                }
+
+            alive.add(pid)
+            results.append(info)
+
+        self._evict(alive)
+        return results
+
+    def io_counters(self, pid):
+        """读取单个进程的累计读写字节数, 无权限或进程已退出时返回None"""
+        if self.use_procfs:
+            try:
+                with open(f"/proc/{pid}/io", "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            counters = {}
+            for line in data.splitlines():
+                key, _, value = line.partition(b":")
+                counters[key] = value
+            try:
+                return int(counters[b"read_bytes"]), int(counters[b"write_bytes"])
+            except (KeyError, ValueError):
+                return None
+
+        entry = self.entries.get(pid)
+        if entry is None or entry.process is None:
+            return None
+        try:
+            io = entry.process.io_counters()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, AttributeError):
+            return None
+        return io.read_bytes, io.write_bytes
+
+    def _evict(self, alive):
+        """移除已退出进程的缓存条目"""
+        if len(alive) == len(self.entries):
+            return
+        for pid in [pid for pid in self.entries if pid not in alive]:
+            del self.entries[pid]
+
+
+# 进程表格各列对应的排序字段
+SORT_FIELDS = ('pid', 'name', 'status', 'cpu_percent', 'memory_percent', 'rss', 'username')
+
+# 超过该比例的键发生变化时直接重建索引
+REBUILD_RATIO = 0.25
+
+
+def _sort_value(proc, field):
+    """取排序值, 缺失值排在最小的一端"""
+    value = proc[field]
+    if isinstance(value, str):
+        return (1, value.lower())
+    if value is None:
+        return (0, 0)
+    return (1, value)
+
+
+class ProcessSorter:
+    """进程排序引擎
+
+    在两次扫描之间维护按(排序值, pid)有序的索引, 只对键发生变化的进程
+    做二分删除和插入; 变化过多时对前N个使用堆选择。
+    """
+
+    def __init__(self, field='cpu_percent', reverse=True):
+        self.order = (field, reverse)
+        self._index = None
+        self._keys = {}
+        self._index_field = None
+
+    def set_sort(self, field, reverse):
+        """设置排序列和方向 (单次引用赋值, 可从其他线程调用)"""
+        if field not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field: {field}")
+        self.order = (field, reverse)
+
+    def select(self, processes, limit=None):
+        """按当前排序返回前limit个进程 (limit为None时返回全部)"""
+        field, reverse = self.order
+        by_pid = {}
+        keys = {}
+        for proc in processes:
+            pid = proc['pid']
+            by_pid[pid] = proc
+            keys[pid] = (_sort_value(proc, field), pid)
+
+        if field != self._index_field:
+            self._index = None
+            self._index_field = field
+
+        old_keys = self._keys
+        changed = [pid for pid, key in keys.items() if old_keys.get(pid) != key]
+        removed = [pid for pid in old_keys if pid not in keys]
+        self._keys = keys
+
+        if self._index is not None and len(changed) + len(removed) <= len(keys) * REBUILD_RATIO:
+            self._update_index(old_keys, keys, changed, removed)
+        elif limit is not None and limit < len(keys):
+            # 变化太多: 只用堆选出前N个, 索引在下次需要时重建
+            self._index = None
+            select = heapq.nlargest if reverse else heapq.nsmallest
+            return [by_pid[pid] for _, pid in select(limit, keys.values())]
+        else:
+            self._index = sorted(keys.values())
+
+        index = self._index
+        if reverse:
+            picked = index[::-1] if limit is None else index[:-limit - 1:-1]
+        else:
+            picked = index if limit is None else index[:limit]
+        return [by_pid[pid] for _, pid in picked]
+
+    def _update_index(self, old_keys, keys, changed, removed):
+        """对有序索引做增量更新"""
+        index = self._index
+        for pid in removed:
+            del index[bisect.bisect_left(index, old_keys[pid])]
+        for pid in changed:
+            old = old_keys.get(pid)
+            if old is not None:
+                del index[bisect.bisect_left(index, old)]
+            bisect.insort(index, keys[pid])
+
+
+# 树形视图中按子树合计排序的字段: 排序字段 -> 合计下标
+TREE_TOTAL_FIELDS = {'cpu_percent': 0, 'rss': 1, 'memory_percent': 2}
+
+
+class ProcessTree:
+    """按ppid组织的进程树
+
+    每个节点保存子树合计 (CPU %, RSS, 内存 %, 进程数)。每次扫描只对新增、
+    退出、换父和数值变化的进程沿祖先链加减差值, 不重建整棵树。
+    """
+
+    def __init__(self):
+        self.procs = {}
+        self.parent = {}
+        self.children = {}
+        self.totals = {}
+
+    @staticmethod
+    def _own(proc):
+        """进程自身计入合计的数值"""
+        return [proc['cpu_percent'] or 0.0, proc['rss'] or 0, proc['memory_percent'] or 0.0, 1]
+
+    def _add_to_chain(self, pid, delta):
+        """从pid开始沿祖先链累加差值"""
+        while pid is not None:
+            totals = self.totals[pid]
+            for i, value in enumerate(delta):
+                totals[i] += value
+            pid = self.parent[pid]
+
+    def _attach(self, pid, ppid):
+        """将pid的子树挂到ppid下; ppid不存在或会形成环时作为根"""
+        node = ppid
+        while node is not None:
+            if node == pid:
+                ppid = None
+                break
+            node = self.parent.get(node)
+        if ppid not in self.procs:
+            ppid = None
+
+        self.parent[pid] = ppid
+        if ppid is not None:
+            self.children[ppid].add(pid)
+            self._add_to_chain(ppid, self.totals[pid])
+
+    def _detach(self, pid):
+        """将pid的子树从父节点摘下"""
+        ppid = self.parent[pid]
+        if ppid is not None:
+            self.children[ppid].discard(pid)
+            self._add_to_chain(ppid, [-value for value in self.totals[pid]])
+            self.parent[pid] = None
+
+    def _remove(self, pid):
+        """移除已退出的进程, 其子进程暂时成为根, 等下次扫描按新的ppid重新挂接"""
+        self._detach(pid)
+        for child in self.children.pop(pid):
+            self.parent[child] = None
+        del self.procs[pid], self.parent[pid], self.totals[pid]
+
+    def update(self, processes):
+        """应用一次扫描结果"""
+        current = {proc['pid']: proc for proc in processes}
+
+        for pid in [pid for pid in self.procs if pid not in current]:
+            self._remove(pid)
+
+        # 新进程先全部登记, 再挂接, 这样父子同时出现时顺序无关
+        new = [pid for pid in current if pid not in self.procs]
+        for pid in new:
+            self.procs[pid] = current[pid]
+            self.parent[pid] = None
+            self.children[pid] = set()
+            self.totals[pid] = self._own(current[pid])
+        for pid in new:
+            self._attach(pid, current[pid]['ppid'])
+
+        new = set(new)
+        for pid, proc in current.items():
+            if pid in new:
+                continue
+            old = self.procs[pid]
+            self.procs[pid] = proc
+
+            ppid = proc['ppid'] if proc['ppid'] in self.procs else None
+            if ppid != self.parent[pid]:
+                self._detach(pid)
+                self._attach(pid, ppid)
+
+            delta = [new_value - old_value for new_value, old_value in zip(self._own(proc), self._own(old))]
+            if any(delta):
+                self._add_to_chain(pid, delta)
+
+    def with_ancestors(self, pids):
+        """返回pids及其所有祖先"""
+        result = set()
+        for pid in pids:
+            while pid is not None and pid not in result:
+                result.add(pid)
+                pid = self.parent.get(pid)
+        return result
+
+    def rows(self, field='cpu_percent', reverse=True, include=None, toggled=frozenset()):
+        """按深度优先顺序返回可见节点带深度和子树合计的进程信息, 兄弟节点按排序字段排列
+
+        根节点默认展开, 其余默认折叠, toggled中的节点与默认状态相反; 折叠节点的
+        后代不输出, 也不排序。指定include时只输出其中的节点 (应包含祖先, 见with_ancestors)。
+        """
+        total_index = TREE_TOTAL_FIELDS.get(field)
+        if total_index is None:
+            def key(pid):
+                return (_sort_value(self.procs[pid], field), pid)
+        else:
+            def key(pid):
+                return (self.totals[pid][total_index], pid)
+
+        result = []
+        roots = sorted(
+            (pid for pid, ppid in self.parent.items() if ppid is None and (include is None or pid in include)),
+            key=key, reverse=reverse
+        )
+        stack = [(pid, 0) for pid in reversed(roots)]
+        while stack:
+            pid, depth = stack.pop()
+            children = self.children[pid]
+            expanded = (depth == 0) != (pid in toggled)
+            cpu, rss, memory, count = self.totals[pid]
+            result.append(dict(
+                self.procs[pid],
+                depth=depth,
+                has_children=bool(children),
+                expanded=expanded,
+                tree_cpu_percent=max(0.0, cpu),
+                tree_rss=rss,
+                tree_memory_percent=max(0.0, memory),
+                tree_count=count,
+            ))
+            if not expanded:
+                continue
+            if include is not None:
+                children = [child for child in children if child in include]
+            if children:
+                stack.extend((child, depth + 1) for child in sorted(children, key=key, reverse=not reverse))
+        return result
+
+
+# 过滤表达式中的数值字段: 名称 -> 进程信息字段
+FILTER_FIELDS = {
+    'cpu': 'cpu_percent',
+    'mem': 'memory_percent',
+    'rss': 'rss',
+    'threads': 'num_threads',
+    'pid': 'pid',
+    'ppid': 'ppid',
+}
+
+FILTER_OPS = {
+    '>': lambda a, b: a > b,
+    '<': lambda a, b: a < b,
+    '>=': lambda a, b: a >= b,
+    '<=': lambda a, b: a <= b,
+    '=': lambda a, b: a == b,
+}
+
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+_NUMERIC_RE = re.compile(r"^(cpu|mem|rss|threads|pid|ppid)(>=|<=|>|<|=)([0-9.]+)([KMGTkmgt]?)(%?)$")
+
+
+class ProcessFilter:
+    """解析后的进程过滤条件, 所有条件之间为"与"关系"""
+
+    __slots__ = ("users", "statuses", "prefixes", "substrings", "patterns", "numeric")
+
+    def __init__(self):
+        self.users = []
+        self.statuses = []
+        self.prefixes = []
+        self.substrings = []
+        self.patterns = []
+        self.numeric = []
+
+
+def parse_filter(text):
+    """解析过滤表达式, 空表达式返回None, 无效时抛出ValueError
+
+    支持: 名称子串 (默认), name:前缀, re:正则 或 /正则/, user:用户, status:状态前缀,
+    以及cpu>5, mem>1G (带单位时按RSS, 否则按内存%), rss, threads, pid, ppid的数值比较。
+    """
+    result = ProcessFilter()
+    for token in text.split():
+        key, sep, value = token.partition(':')
+        key = key.lower()
+        if sep and value and key in ('user', 'u'):
+            result.users.append(value)
+        elif sep and value and key in ('status', 's'):
+            result.statuses.append(value.lower())
+        elif sep and value and key in ('name', 'n'):
+            result.prefixes.append(value.lower())
+        elif sep and value and key == 're':
+            result.patterns.append(_compile(value))
+        elif len(token) > 2 and token.startswith('/') and token.endswith('/'):
+            result.patterns.append(_compile(token[1:-1]))
+        else:
+            match = _NUMERIC_RE.match(token)
+            if match:
+                result.numeric.append(_numeric_predicate(*match.groups()))
+            else:
+                result.substrings.append(token.lower())
+
+    if not any(getattr(result, name) for name in ProcessFilter.__slots__):
+        return None
+    return result
+
+
+def _compile(pattern):
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Invalid regex {pattern!r}: {e}")
+
+
+def _numeric_predicate(name, op, number, suffix, percent):
+    """返回 (字段, 比较函数, 阈值)"""
+    try:
+        value = float(number)
+    except ValueError:
+        raise ValueError(f"Invalid number: {number}")
+    field = FILTER_FIELDS[name]
+    if suffix:
+        value *= SIZE_SUFFIXES[suffix.upper()]
+        if name == 'mem':
+            field = 'rss'
+    return field, FILTER_OPS[op], value
+
+
+class ProcessIndex:
+    """进程过滤索引
+
+    按用户、状态和名称 (小写) 维护pid集合, 名称另有有序列表用于前缀查找。
+    用户和名称只在进程出现或退出时变化, 每次扫描只更新键发生变化的进程;
+    子串和正则只需匹配互不相同的名称, 而不是每个进程。
+    """
+
+    def __init__(self):
+        self.procs = {}
+        self.by_user = {}
+        self.by_status = {}
+        self.by_name = {}
+        self.names = []
+        self._keys = {}
+
+    def update(self, processes):
+        """应用一次扫描结果"""
+        procs = {proc['pid']: proc for proc in processes}
+        for pid in [pid for pid in self._keys if pid not in procs]:
+            self._unindex(pid)
+
+        keys = self._keys
+        for pid, proc in procs.items():
+            key = (proc['username'], proc['status'], (proc['name'] or "").lower())
+            old = keys.get(pid)
+            if old != key:
+                if old is not None:
+                    self._unindex(pid)
+                self._index(pid, key)
+        self.procs = procs
+
+    def _index(self, pid, key):
+        user, status, name = key
+        self._keys[pid] = key
+        self.by_user.setdefault(user, set()).add(pid)
+        self.by_status.setdefault(status, set()).add(pid)
+        if name not in self.by_name:
+            self.by_name[name] = set()
+            bisect.insort(self.names, name)
+        self.by_name[name].add(pid)
+
+    def _unindex(self, pid):
+        user, status, name = self._keys.pop(pid)
+        for index, value in ((self.by_user, user), (self.by_status, status), (self.by_name, name)):
+            pids = index[value]
+            pids.discard(pid)
+            if not pids:
+                del index[value]
+                if index is self.by_name:
+                    del self.names[bisect.bisect_left(self.names, name)]
+
+    def _names_matching(self, test):
+        """返回名称满足test的所有pid"""
+        result = set()
+        for name, pids in self.by_name.items():
+            if test(name):
+                result |= pids
+        return result
+
+    def _names_with_prefix(self, prefix):
+        lo = bisect.bisect_left(self.names, prefix)
+        hi = bisect.bisect_left(self.names, prefix + "\uffff")
+        result = set()
+        for name in self.names[lo:hi]:
+            result |= self.by_name[name]
+        return result
+
+    def match(self, process_filter):
+        """返回满足过滤条件的pid集合, 无过滤条件时返回None"""
+        if process_filter is None:
+            return None
+
+        candidates = []
+        for user in process_filter.users:
+            candidates.append(self.by_user.get(user, set()))
+        for status in process_filter.statuses:
+            candidates.append(set().union(*(
+                pids for key, pids in self.by_status.items() if key and key.startswith(status)
+            )))
+        for prefix in process_filter.prefixes:
+            candidates.append(self._names_with_prefix(prefix))
+        for substring in process_filter.substrings:
+            candidates.append(self._names_matching(lambda name: substring in name))
+        for pattern in process_filter.patterns:
+            candidates.append(self._names_matching(pattern.search))
+
+        if candidates:
+            candidates.sort(key=len)
+            result = candidates[0].intersection(*candidates[1:])
+        else:
+            result = set(self.procs)
+
+        # 数值条件只对候选进程逐个检查
+        for field, compare, value in process_filter.numeric:
+            procs = self.procs
+            result = {pid for pid in result if procs[pid][field] is not None and compare(procs[pid][field], value)}
+        return result
@@ -0,0 +1,185 @@
+"""
+PyDEX-UI 进程表格模块
+按键 (如PID) 复用表格行, 每次只更新发生变化的单元格; 进程表格只渲染可见的行
+"""
+
+import dearpygui.dearpygui as dpg
+
+
+def format_process_row(proc):
+    """将进程信息格式化为表格各列的文本"""
+    memory_mb = proc['rss'] / (1024 * 1024) if proc['rss'] else 0
+    return (
+        str(proc['pid']),
+        proc['name'] or "N/A",
+        proc['status'] or "N/A",
+        f"{proc['cpu_percent'] or 0:.1f}" if proc['cpu_percent'] else "0.0",
+        f"{proc['memory_percent'] or 0:.1f}" if proc['memory_percent'] else "0.0",
+        f"{memory_mb:.1f}",
+        proc['username'] or "N/A",
+    )
+
+
+def format_tree_row(proc):
+    """将进程树中的一行格式化为表格文本, 数值列为子树合计"""
+    if proc['has_children']:
+        marker = "[-]" if proc['expanded'] else "[+]"
+        name = f"{proc['name'] or 'N/A'} ({proc['tree_count']})"
+    else:
+        marker = "   "
+        name = proc['name'] or "N/A"
+    return (
+        f"{marker} {proc['pid']}",
+        "  " * proc['depth'] + name,
+        proc['status'] or "N/A",
+        f"{proc['tree_cpu_percent']:.1f}",
+        f"{proc['tree_memory_percent']:.1f}",
+        f"{proc['tree_rss'] / (1024 * 1024):.1f}",
+        proc['username'] or "N/A",
+    )
+
+
+class PooledTable:
+    """基于行池的表格, 每行由一个键标识
+
+    指定on_select时首列为可选中的单元格, 点击时以该行的键调用on_select。
+    """
+
+    def __init__(self, table_tag, on_select=None):
+        self.table_tag = table_tag
+        self.on_select = on_select
+
+        # 键 -> [行ID, 单元格ID列表, 当前文本]
+        self.rows = {}
+        self.order = []
+        self.cell_updates = 0
+
+    def update_rows(self, items):
+        """按给定顺序显示 (键, 各列文本), 只改动新增/移除的行和变化的单元格"""
+        seen = set()
+        order = []
+        self.cell_updates = 0
+
+        for key, values in items:
+            seen.add(key)
+
+            entry = self.rows.get(key)
+            if entry is None:
+                entry = self._add_row(key, values)
+                self.rows[key] = entry
+            else:
+                self._update_row(entry, values)
+            order.append(entry[0])
+
+        # 删除不再显示的行
+        for key in [key for key in self.rows if key not in seen]:
+            dpg.delete_item(self.rows.pop(key)[0])
+
+        # 只有顺序变化时才重新排列
+        if order != self.order:
+            dpg.reorder_items(self.table_tag, 1, order)
+            self.order = order
+
+    def clear(self):
+        """删除所有行"""
+        dpg.delete_item(self.table_tag, children_only=True, slot=1)
+        self.rows.clear()
+        self.order = []
+
+    def _add_row(self, key, values):
+        """创建一行并返回行池条目"""
+        with dpg.table_row(parent=self.table_tag) as row:
+            cells = []
+            for i, value in enumerate(values):
+                if i == 0 and self.on_select:
+                    cells.append(dpg.add_selectable(
+                        label=value, span_columns=True, user_data=key, callback=self._on_select
+                    ))
+                else:
+                    cells.append(dpg.add_text(value))
+        self.cell_updates += len(values)
+        return [row, cells, list(values)]
+
+    def _update_row(self, entry, values):
+        """更新一行中发生变化的单元格"""
+        _, cells, current = entry
+        for i, value in enumerate(values):
+            if current[i] != value:
+                if i == 0 and self.on_select:
+                    dpg.configure_item(cells[i], label=value)
+                else:
+                    dpg.set_value(cells[i], value)
+                current[i] = value
+                self.cell_updates += 1
+
+    def _on_select(self, sender, app_data, user_data):
+        """点击首列时取消选中状态并通知调用方"""
+        dpg.set_value(sender, False)
+        self.on_select(user_data)
+
+
+class ProcessTable(PooledTable):
+    """固定行数的进程表格
+
+    行池只有view_rows行, 以行在视图中的位置为键, 与进程数无关。每次更新只保存
+    进程列表的引用, 只格式化从top开始的可见切片, 并只改动变化的单元格; 滚动只
+    移动切片。树形模式下进程列表只包含可见的节点, 由采集器按折叠状态输出。
+    点击一行时以pid调用on_process_select, 树形模式下先以pid调用on_process_toggle。
+    """
+
+    def __init__(self, table_tag, view_rows, on_process_select=None, on_process_toggle=None):
+        super().__init__(table_tag, on_select=self._on_row_select)
+        self.view_rows = view_rows
+        self.on_process_select = on_process_select
+        self.on_process_toggle = on_process_toggle
+        self.tree_mode = False
+
+        # 全部可显示的进程, 首个可见行, 当前可见的切片
+        self.processes = ()
+        self.top = 0
+        self.visible = ()
+
+    def update(self, processes):
+        """按给定顺序显示进程"""
+        self.processes = processes
+        self.render()
+
+    def scroll(self, top):
+        """将第top个进程滚动到视图顶部"""
+        self.top = top
+        self.render()
+
+    @property
+    def max_top(self):
+        """top的最大值"""
+        return max(0, len(self.processes) - self.view_rows)
+
+    def render(self):
+        """格式化可见切片并更新行池"""
+        self.top = max(0, min(self.top, self.max_top))
+        self.visible = self.processes[self.top:self.top + self.view_rows]
+        rows = map(format_tree_row if self.tree_mode else format_process_row, self.visible)
+        self.update_rows(enumerate(rows))
+
+    def clear(self):
+        """删除所有行"""
+        super().clear()
+        self.processes = ()
+        self.visible = ()
+        self.top = 0
+
+    def find(self, pid):
+        """返回可见切片中pid的进程信息, 不在其中时为None"""
+        for proc in self.visible:
+            if proc['pid'] == pid:
+                return proc
+        return None
+
+    def _on_row_select(self, slot):
+        if slot >= len(self.visible):
+            return
+        proc = self.visible[slot]
+        if self.tree_mode and proc['has_children'] and self.on_process_toggle:
+            self.on_process_toggle(proc['pid'])
+        if self.on_process_select:
+            self.on_process_select(proc['pid'])
@@ -0,0 +1,166 @@
+"""
+PyDEX-UI 自身性能分析模块
+记录更新循环各环节的耗时、控件更新次数、GC暂停和进程内存, 提供滚动百分位统计
+"""
+
+import gc
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import psutil
+
+from HistoryModule import RingBuffer
+
+# 每个指标保留的最近样本数
+WINDOW = 1024
+
+# 更新循环的默认预算 (毫秒, p99)
+UPDATE_BUDGET_MS = 2.0
+
+
+class RollingStats:
+    """定长滚动窗口统计"""
+
+    def __init__(self, unit="ms", capacity=WINDOW):
+        self.unit = unit
+        self.samples = RingBuffer(capacity)
+        self.total = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.total += 1
+
+    def summary(self):
+        """返回 {count, last, p50, p95, p99, max}"""
+        values = sorted(self.samples.last())
+        if not values:
+            return None
+        n = len(values)
+        return {
+            "unit": self.unit,
+            "count": self.total,
+            "last": self.samples.latest(),
+            "p50": values[int(n * 0.50)],
+            "p95": values[min(n - 1, int(n * 0.95))],
+            "p99": values[min(n - 1, int(n * 0.99))],
+            "max": values[-1],
+        }
+
+
+class Profiler:
+    """热点路径分析器
+
+    每个指标只由一个线程写入 (渲染线程或采集线程), 因此无需加锁。
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self._gc_start = None
+        self._process = psutil.Process(os.getpid())
+        gc.callbacks.append(self._on_gc)
+
+    def _get(self, name, unit):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = RollingStats(unit)
+        return stats
+
+    @contextmanager
+    def section(self, name):
+        """统计一段代码的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._get(name, "ms").add((time.perf_counter() - start) * 1000)
+
+    def record(self, name, value, unit="ms"):
+        """直接记录一个样本"""
+        self._get(name, unit).add(value)
+
+    def count(self, name, value):
+        """记录计数类样本 (如控件更新次数)"""
+        self._get(name, "n").add(value)
+
+    def _on_gc(self, phase, info):
+        """gc回调: 统计各代回收的暂停时间"""
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            self._get(f"gc.gen{info['generation']}", "ms").add((time.perf_counter() - self._gc_start) * 1000)
+            self._gc_start = None
+
+    def sample_rss(self):
+        """记录本进程的常驻内存"""
+        self.record("process.rss", self._process.memory_info().rss / (1024 * 1024), "MB")
+
+    def report(self):
+        """返回所有指标的统计"""
+        report = {}
+        for name in sorted(self.stats):
+            summary = self.stats[name].summary()
+            if summary:
+                report[name] = summary
+        return report
+
+    def format_report(self, budget_ms=UPDATE_BUDGET_MS):
+        """格式化为叠加层显示的文本"""
+        report = self.report()
+        lines = [f"{'metric':<32}{'last':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        for name, s in report.items():
+            lines.append(
+                f"{name:<32}{s['last']:>9.2f}{s['p50']:>9.2f}{s['p95']:>9.2f}"
+                f"{s['p99']:>9.2f}{s['max']:>9.2f} {s['unit']}"
+            )
+
+        update = report.get("update_all_data")
+        if update:
+            state = "OK" if update["p99"] <= budget_ms else "OVER BUDGET"
+            lines.append(f"\nUpdate loop p99 {update['p99']:.2f} ms / budget {budget_ms:.1f} ms: {state}")
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        """将统计写入JSON文件并返回路径"""
+        if path is None:
+            path = f"pydex-profile-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        with open(path, "w") as f:
+            json.dump({"timestamp": time.time(), "metrics": self.report()}, f, indent=2)
+        return path
+
+
+class StartupProfile:
+    """启动各阶段的耗时, 从进程创建时刻开始计算"""
+
+    def __init__(self):
+        try:
+            self.start = psutil.Process(os.getpid()).create_time()
+        except psutil.Error:
+            self.start = time.time()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, name):
+        """记录从上一个标记到现在的阶段"""
+        now = time.time()
+        self.phases.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    def record(self, name, ms):
+        """记录一个不连续的阶段 (如首次打开标签页时的构建)"""
+        self.phases.append((name, ms))
+
+    def format_report(self):
+        """格式化为文本"""
+        lines = [f"{'phase':<32}{'ms':>10}"]
+        lines.extend(f"{name:<32}{ms:>10.1f}" for name, ms in self.phases)
+        lines.append(f"{'since process start':<32}{(self.last - self.start) * 1000:>10.1f}")
+        return "\n".join(lines)
+
+
+# 全局分析器, 渲染线程和采集线程共用
+PROFILER = Profiler()
+
+# 启动阶段计时
+STARTUP = StartupProfile()
@@ -5,31 +5,204 @@ PyDEX-UI - 科幻风格系统监控和终端模拟器
 """
 
 import dearpygui.dearpygui as dpg
-import psutil
+import argparse
+import codecs
+import io
+import os
+import re
 import time
-import subprocess
-import threading
-import platform
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from AlertModule import AlertEngine, default_alert_log, load_rules
+from CollectorModule import PROBE_INTERVALS, PROBES, SystemCollector
+from DiskModule import DirectoryScanner, format_size
+from HistoryModule import HISTORY_SECONDS, HISTORY_WINDOWS, MatrixRing, MetricHistory, history_capacity
+from JobModule import DONE, KILLED, QUEUED, JobManager
+from LogModule import LogFile, LogSearch
+from ProcessModule import SORT_FIELDS
+from ProcessTableModule import PooledTable, ProcessTable
+from ProfilerModule import PROFILER, STARTUP
+from RemoteModule import DEFAULT_ADDRESS, RemoteCollector, serve
+from SplashModule import close_splash, update_splash
+from StoreModule import MetricStore, default_store_dir
+from TerminalModule import ShellIOLoop, ShellSession, TerminalBuffer, pty
+
+# 各主标签页可见时需要正常采样的采集项, 其余采集项放慢
+TAB_PROBES = {
+    "system_tab": ("cpu", "memory", "disk", "network", "connections", "status"),
+    "devices_tab": ("cpu", "disk", "network", "status"),
+    "disks_tab": ("mounts", "status"),
+    "terminal_tab": ("status",),
+    "logs_tab": ("status",),
+    "jobs_tab": ("status",),
+    "process_tab": ("processes", "status"),
+}
+
+# 首次打开时才构建的标签页 -> 构建方法
+TAB_BUILDERS = {
+    "devices_tab": "create_devices_tab",
+    "disks_tab": "create_disks_tab",
+    "terminal_tab": "create_terminal_tab",
+    "logs_tab": "create_logs_tab",
+    "jobs_tab": "create_jobs_tab",
+    "process_tab": "create_process_monitor_tab",
+}
+
+# 只更新某个延迟构建标签页的采集项, 标签页构建前跳过
+HANDLER_TABS = {
+    "mounts": "disks_tab",
+    "processes": "process_tab",
+}
+
+# 首帧后等待首批数据的最长时间, 超时也关闭启动画面 (秒)
+SPLASH_TIMEOUT = 10.0
+
+# 设备热力图 (key, 标题) 及显示的样本数
+DEVICE_HEATMAPS = (
+    ("cpu", "Per-Core CPU %"),
+    ("disk", "Per-Disk I/O (KB/s, read + write)"),
+    ("nic", "Per-NIC I/O (KB/s, up + down)"),
+)
+DEVICE_SAMPLES = 120
+
+# 进程详情图表 (key, 标题, 序列) 及显示的时间范围 (秒)
+PROCESS_DETAIL_PLOTS = (
+    ("cpu", "CPU %", ("cpu",)),
+    ("rss", "RSS (MB)", ("rss",)),
+    ("io", "I/O (KB/s)", ("read", "write")),
+    ("threads", "Threads", ("threads",)),
+)
+PROCESS_DETAIL_SECONDS = 1800
+
+# 进程表格可见的行数, 行池大小与进程数无关
+PROCESS_VIEW_ROWS = 25
+
+# 目录分析表格最多显示的子目录数
+DISK_SCAN_ROWS = 200
+
+# 日志查看默认打开的文件及每次渲染的行数
+DEFAULT_LOG_PATH = "/var/log/syslog"
+LOG_VIEW_LINES = 40
+
+# 同时运行的命令任务数
+JOB_WORKERS = 4
+
+# 视口最小化和空闲时的整体间隔倍数
+MINIMIZED_THROTTLE = 10.0
+IDLE_THROTTLE = 4.0
+IDLE_SECONDS = 120
+
 class PyDexUI:
-    def __init__(self):
+    def __init__(self, collector=None, store=None, alerts=None, startup_profile=False, job_workers=JOB_WORKERS):
+        self.startup_profile = startup_profile
+        
         # 初始化数据存储
-        self.cpu_history = []
-        self.memory_history = []
-        self.network_history = []
-        self.disk_history = []
+        self.cpu_history = MetricHistory(["cpu"], history_capacity(PROBE_INTERVALS["cpu"]))
+        self.memory_history = MetricHistory(["memory"], history_capacity(PROBE_INTERVALS["memory"]))
+        self.network_history = MetricHistory(["upload", "download"], history_capacity(PROBE_INTERVALS["network"]))
+        self.disk_history = MetricHistory(["read", "write"], history_capacity(PROBE_INTERVALS["disk"]))
+        self.history_window = HISTORY_WINDOWS[0][1]
+        
+        # 历史数据与图表的对应关系: (历史, 图表, X轴, {序列: 线条}, (持久化采集项, {序列: 字段}))
+        self.history_plots = [
+            (self.cpu_history, "cpu_history_plot", "cpu_x_axis", {"cpu": "cpu_plot"},
+             ("cpu", {"cpu": "percent"})),
+            (self.memory_history, "memory_history_plot", "memory_x_axis", {"memory": "memory_plot"},
+             ("memory", {"memory": "percent"})),
+            (self.network_history, "network_history_plot", "network_x_axis",
+             {"upload": "network_upload_plot", "download": "network_download_plot"},
+             ("network", {"upload": "upload_speed", "download": "download_speed"})),
+            (self.disk_history, "disk_history_plot", "disk_x_axis",
+             {"read": "disk_read_plot", "write": "disk_write_plot"},
+             ("disk", {"read": "read_speed", "write": "write_speed"})),
+        ]
         
-        # 网络统计
-        self.last_net_io = psutil.net_io_counters()
-        self.last_net_time = time.time()
+        # 设备热力图的二维环形缓冲区: key -> (MatrixRing, 设备名称)
+        self.device_rings = {}
         
-        # 磁盘统计
-        self.last_disk_io = psutil.disk_io_counters()
-        self.last_disk_time = time.time()
+        # 持久化历史: 启动时在后台线程读取最近的数据, 由apply_stored_history补入内存历史;
+        # 超出内存范围的窗口同样在后台线程从磁盘读取
+        # 图表 -> (Future, 分段存储, 字段映射, 序列, X轴, 起点, 终点)
+        self.store = store
+        self.store_refresh = {}
+        self.store_queries = {}
+        self.store_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pydex-history") if store else None
+        self.stored_history = self.store_pool.submit(self.read_stored_history) if store else None
+        STARTUP.mark("history")
         
-        # 初始化GUI
+        # 后台采集器, 所有psutil调用都在其线程中完成; 也可以是远程采集器
+        self.collector = collector or SystemCollector(store=store, alerts=alerts)
+        self.applied_snapshot = None
+        self.applied_alerts = None
+        
+        # 采集项 -> 界面更新方法
+        self.snapshot_handlers = [
+            ("cpu", self.update_cpu_info),
+            ("memory", self.update_memory_info),
+            ("disk", self.update_disk_info),
+            ("mounts", self.update_mounts_info),
+            ("network", self.update_network_info),
+            ("connections", self.update_connection_info),
+            ("processes", self.update_process_list),
+            ("status", self.update_status_bar),
+        ]
+        self.last_profile_refresh = 0.0
+        self.applied_versions = {}
+        self.last_input_time = time.monotonic()
+        
+        # 终端会话: 标签页ID -> {"buffer", "output", "session"}
+        self.terminals = {}
+        self.active_terminal = None
+        self.shell_loop = ShellIOLoop() if pty else None
+        if self.shell_loop:
+            self.shell_loop.start()
+        
+        # 进程表格: 固定大小的行池, 只渲染可见的行
+        self.process_table = ProcessTable(
+            "process_table", PROCESS_VIEW_ROWS,
+            on_process_select=self.on_process_select,
+            on_process_toggle=self.collector.toggle_tree_node
+        )
+        self.selected_pid = None
+        
+        # 分区列表和目录大小分析
+        self.mounts_table = PooledTable("mounts_table", on_select=self.start_disk_scan)
+        self.scan_table = PooledTable("disk_scan_table", on_select=self.start_disk_scan)
+        self.scanner = DirectoryScanner()
+        self.disk_scan_path = None
+        self.applied_scan = None
+        
+        # 日志查看: 当前文件、搜索、首个可见行、当前匹配行和上次渲染的状态
+        self.log_file = None
+        self.log_search = None
+        self.log_top = 0
+        self.log_follow = True
+        self.log_match = None
+        self.applied_log = None
+        
+        # 命令任务: 有界线程池; 没有伪终端时终端中的命令也作为任务运行
+        self.jobs = JobManager(job_workers)
+        self.jobs_table = PooledTable("jobs_table", on_select=self.on_job_select)
+        self.selected_job = None
+        self.job_page = 0
+        self.job_follow = True
+        self.applied_jobs = None
+        self.applied_job_page = None
+        
+        # 初始化GUI: 只构建默认标签页, 其余标签页首次打开时构建
+        self.built_tabs = {"system_tab"}
+        self.active_tab = "system_tab"
+        self.ready_state = None
+        self.first_frame_time = None
+        update_splash("Building interface...")
         self.setup_gui()
+        STARTUP.mark("gui")
+        
+        # 首批采样在采集线程中进行, 不阻塞首帧
+        self.collector.set_visible(TAB_PROBES["system_tab"])
+        self.collector.start()
+        STARTUP.mark("collector_start")
         
     def setup_gui(self):
         """设置GUI界面"""
@@ -38,7 +211,7 @@ class PyDexUI:
         # 创建科幻风格主题
         self.create_scifi_theme()
         
-        # 创建视口
+        # 创建并先显示视口, 再构建窗口内容
         dpg.create_viewport(
             title='PyDEX-UI - Sci-Fi System Monitor', 
             width=1200, 
@@ -46,6 +219,8 @@ class PyDexUI:
             resizable=True,
             vsync=True
         )
+        dpg.setup_dearpygui()
+        dpg.show_viewport()
         
         # 创建主窗口
         with dpg.window(
@@ -58,29 +233,66 @@ class PyDexUI:
             no_scrollbar=True
         ):
             # 创建标签页
-            with dpg.tab_bar(tag="Main Tab Bar"):
+            with dpg.tab_bar(tag="Main Tab Bar", callback=self.on_main_tab_change):
                 # 系统监控标签页
-                with dpg.tab(label="System Monitor"):
+                with dpg.tab(label="System Monitor", tag="system_tab"):
                     self.create_system_monitor_tab()
                 
-                # 终端标签页
-                with dpg.tab(label="Terminal"):
-                    self.create_terminal_tab()
-                
-                # 进程监控标签页
-                with dpg.tab(label="Processes"):
-                    self.create_process_monitor_tab()
+                # 设备明细、分区和目录大小、终端、日志、任务、进程监控标签页 (延迟构建)
+                dpg.add_tab(label="Devices", tag="devices_tab")
+                dpg.add_tab(label="Disks", tag="disks_tab")
+                dpg.add_tab(label="Terminal", tag="terminal_tab")
+                dpg.add_tab(label="Logs", tag="logs_tab")
+                dpg.add_tab(label="Jobs", tag="jobs_tab")
+                dpg.add_tab(label="Processes", tag="process_tab")
             
             # 底部状态栏
             self.create_status_bar()
         
-        # 设置视口
-        dpg.setup_dearpygui()
-        dpg.show_viewport()
+        # 性能分析叠加层
+        self.create_profiler_overlay()
+        
+        # 键盘快捷键
+        with dpg.handler_registry():
+            dpg.add_key_press_handler(dpg.mvKey_Prior, callback=self.on_terminal_scroll, user_data=1)
+            dpg.add_key_press_handler(dpg.mvKey_Next, callback=self.on_terminal_scroll, user_data=-1)
+            
+            dpg.add_key_press_handler(dpg.mvKey_F12, callback=self.toggle_profiler)
+            
+            # 记录用户输入, 用于空闲时降低采样频率
+            dpg.add_key_press_handler(callback=self.on_user_input)
+            dpg.add_mouse_move_handler(callback=self.on_user_input)
+            dpg.add_mouse_click_handler(callback=self.on_user_input)
+            
+            # 日志视图和进程表格只渲染可见的行, 滚轮滚动由应用处理
+            dpg.add_mouse_wheel_handler(callback=self.on_log_wheel)
+            dpg.add_mouse_wheel_handler(callback=self.on_process_wheel)
+        
         dpg.set_primary_window("Primary Window", True)
+    
+    def build_tab(self, alias):
+        """首次打开标签页时构建其内容, 并应用最新快照中对应的数据"""
+        if alias in self.built_tabs or alias not in TAB_BUILDERS:
+            return
+        self.built_tabs.add(alias)
         
-        # 设置定时器更新数据
-        dpg.set_frame_callback(1, self.update_all_data)
+        start = time.perf_counter()
+        dpg.push_container_stack(alias)
+        try:
+            getattr(self, TAB_BUILDERS[alias])()
+        finally:
+            dpg.pop_container_stack()
+        ms = (time.perf_counter() - start) * 1000
+        STARTUP.record(f"build_tab.{alias}", ms)
+        if self.startup_profile:
+            print(f"build_tab.{alias}: {ms:.1f} ms")
+        
+        snapshot = self.applied_snapshot
+        if snapshot is None:
+            return
+        for name, handler in self.snapshot_handlers:
+            if HANDLER_TABS.get(name) == alias and getattr(snapshot, name) is not None:
+                handler(getattr(snapshot, name), snapshot.times[name])
     
     def create_scifi_theme(self):
         """创建科幻风格主题"""
@@ -171,15 +383,26 @@ class PyDexUI:
                 dpg.add_text("Upload: ", tag="network_upload")
                 dpg.add_text("Download: ", tag="network_download")
                 dpg.add_text("Connections: ", tag="network_connections")
+                dpg.add_text("", tag="network_connection_states")
+        
+        # 历史窗口选择
+        with dpg.group(horizontal=True):
+            dpg.add_text("History:", color=(0, 255, 255))
+            dpg.add_radio_button(
+                [label for label, _ in HISTORY_WINDOWS],
+                default_value=HISTORY_WINDOWS[0][0],
+                horizontal=True,
+                callback=self.on_history_window_change
+            )
         
         # 图表区域
         with dpg.group(horizontal=True):
             # CPU历史图表
             with dpg.child_window(width=600, height=300):
                 dpg.add_text("CPU Usage History", color=(0, 255, 255))
-                with dpg.plot(label="CPU History", height=250, width=-1):
+                with dpg.plot(label="CPU History", height=250, width=-1, tag="cpu_history_plot"):
                     dpg.add_plot_legend()
-                    dpg.add_plot_axis(dpg.mvXAxis, label="Time", no_gridlines=True)
+                    dpg.add_plot_axis(dpg.mvXAxis, label="Time", no_gridlines=True, time=True, tag="cpu_x_axis")
                     y_axis = dpg.add_plot_axis(dpg.mvYAxis, label="Percentage", no_gridlines=True)
                     # 移除color参数，使用默认颜色
                     dpg.add_line_series([], [], label="CPU %", parent=y_axis, tag="cpu_plot")
@@ -187,9 +410,9 @@ class PyDexUI:
             # 内存历史图表
             with dpg.child_window(width=600, height=300):
                 dpg.add_text("Memory Usage History", color=(0, 255, 255))
-                with dpg.plot(label="Memory History", height=250, width=-1):
+                with dpg.plot(label="Memory History", height=250, width=-1, tag="memory_history_plot"):
                     dpg.add_plot_legend()
-                    dpg.add_plot_axis(dpg.mvXAxis, label="Time", no_gridlines=True)
+                    dpg.add_plot_axis(dpg.mvXAxis, label="Time", no_gridlines=True, time=True, tag="memory_x_axis")
                     y_axis = dpg.add_plot_axis(dpg.mvYAxis, label="Percentage", no_gridlines=True)
                     # 移除color参数，使用默认颜色
                     dpg.add_line_series([], [], label="Memory %", parent=y_axis, tag="memory_plot")
@@ -199,9 +422,9 @@ class PyDexUI:
             # 网络历史图表
             with dpg.child_window(width=600, height=300):
                 dpg.add_text("Network I/O History", color=(0, 255, 255))
-                with dpg.plot(label="Network History", height=250, width=-1):
+                with dpg.plot(label="Network History", height=250, width=-1, tag="network_history_plot"):
                     dpg.add_plot_legend()
-                    dpg.add_plot_axis(dpg.mvXAxis, label="Time", no_gridlines=True)
+                    dpg.add_plot_axis(dpg.mvXAxis, label="Time", no_gridlines=True, time=True, tag="network_x_axis")
                     y_axis = dpg.add_plot_axis(dpg.mvYAxis, label="KB/s", no_gridlines=True)
                     # 移除color参数，使用默认颜色
                     dpg.add_line_series([], [], label="Upload", parent=y_axis, tag="network_upload_plot")
@@ -210,43 +433,510 @@ class PyDexUI:
             # 磁盘I/O历史图表
             with dpg.child_window(width=600, height=300):
                 dpg.add_text("Disk I/O History", color=(0, 255, 255))
-                with dpg.plot(label="Disk History", height=250, width=-1):
+                with dpg.plot(label="Disk History", height=250, width=-1, tag="disk_history_plot"):
                     dpg.add_plot_legend()
-                    dpg.add_plot_axis(dpg.mvXAxis, label="Time", no_gridlines=True)
+                    dpg.add_plot_axis(dpg.mvXAxis, label="Time", no_gridlines=True, time=True, tag="disk_x_axis")
                     y_axis = dpg.add_plot_axis(dpg.mvYAxis, label="KB/s", no_gridlines=True)
                     # 移除color参数，使用默认颜色
                     dpg.add_line_series([], [], label="Read", parent=y_axis, tag="disk_read_plot")
                     dpg.add_line_series([], [], label="Write", parent=y_axis, tag="disk_write_plot")
     
+    def create_devices_tab(self):
+        """创建逐核/逐盘/逐网卡的热力图标签页"""
+        with dpg.child_window(width=-1, height=-1):
+            for key, label in DEVICE_HEATMAPS:
+                dpg.add_text(label, color=(0, 255, 255))
+                with dpg.plot(height=220, width=-1, no_mouse_pos=True, tag=f"{key}_heat_plot"):
+                    dpg.add_plot_axis(dpg.mvXAxis, label="Samples", no_gridlines=True, no_tick_labels=True)
+                    with dpg.plot_axis(dpg.mvYAxis, no_gridlines=True, tag=f"{key}_heat_y"):
+                        dpg.add_heat_series([], 1, 1, col_major=True, format="", tag=f"{key}_heat")
+                dpg.bind_colormap(f"{key}_heat_plot", dpg.mvPlotColormap_Cool)
+    
+    def update_device_heatmap(self, key, names, row, scale_max=None):
+        """追加一列设备样本并刷新热力图 (设备为行, 时间为列)"""
+        ring, shown = self.device_rings.get(key, (None, None))
+        if ring is None or shown != names:
+            ring = MatrixRing(DEVICE_SAMPLES, len(names))
+            self.device_rings[key] = (ring, names)
+            
+            # 设备太多时不显示名称
+            rows = len(names)
+            ticks = tuple((name, rows - i - 0.5) for i, name in enumerate(names)) if rows <= 32 else ()
+            dpg.set_axis_ticks(f"{key}_heat_y", ticks)
+        
+        ring.append(row)
+        values = ring.last()
+        if scale_max is None:
+            scale_max = max(values) or 1.0
+        
+        cols = len(ring)
+        dpg.set_value(f"{key}_heat", [values])
+        dpg.configure_item(
+            f"{key}_heat",
+            rows=len(names),
+            cols=cols,
+            scale_max=scale_max,
+            bounds_min=(0, 0),
+            bounds_max=(cols, len(names))
+        )
+    
+    def create_disks_tab(self):
+        """创建分区列表和目录大小分析标签页"""
+        table_options = dict(
+            header_row=True,
+            borders_innerH=True,
+            borders_outerH=True,
+            borders_innerV=True,
+            borders_outerV=True,
+            row_background=True,
+            resizable=True,
+            scrollY=True,
+            freeze_rows=1,
+        )
+        
+        with dpg.child_window(width=-1, height=-1):
+            dpg.add_text("Mounted Partitions", color=(0, 255, 255))
+            with dpg.table(height=200, tag="mounts_table", **table_options):
+                dpg.add_table_column(label="Mount", init_width_or_weight=0.25)
+                dpg.add_table_column(label="Device", init_width_or_weight=0.2)
+                dpg.add_table_column(label="Type", init_width_or_weight=0.1)
+                dpg.add_table_column(label="Used", init_width_or_weight=0.12)
+                dpg.add_table_column(label="Free", init_width_or_weight=0.12)
+                dpg.add_table_column(label="Total", init_width_or_weight=0.12)
+                dpg.add_table_column(label="Use %", init_width_or_weight=0.09)
+            
+            dpg.add_separator()
+            
+            # 目录大小分析: 点击分区或子目录向下钻取, Rescan忽略缓存重新统计文件大小
+            with dpg.group(horizontal=True):
+                dpg.add_text("Directory Sizes", color=(0, 255, 255))
+                dpg.add_input_text(
+                    default_value=os.path.abspath(os.sep),
+                    tag="disk_scan_path",
+                    width=400,
+                    callback=lambda sender, app_data: self.start_disk_scan(app_data),
+                    on_enter=True
+                )
+                dpg.add_button(label="Scan", callback=lambda: self.start_disk_scan(dpg.get_value("disk_scan_path")))
+                dpg.add_button(
+                    label="Rescan",
+                    callback=lambda: self.start_disk_scan(dpg.get_value("disk_scan_path"), refresh=True)
+                )
+                dpg.add_button(label="Up", callback=self.on_disk_scan_up)
+                dpg.add_text("", tag="disk_scan_status")
+            
+            with dpg.table(clipper=True, tag="disk_scan_table", **table_options):
+                dpg.add_table_column(label="Directory", init_width_or_weight=0.6)
+                dpg.add_table_column(label="Size", init_width_or_weight=0.2)
+                dpg.add_table_column(label="Share %", init_width_or_weight=0.2)
+    
+    def update_mounts_info(self, mounts, timestamp):
+        """更新分区列表"""
+        self.mounts_table.update_rows(
+            (part["mountpoint"], (
+                part["mountpoint"],
+                part["device"],
+                part["fstype"],
+                format_size(part["used"]),
+                format_size(part["free"]),
+                format_size(part["total"]),
+                f"{part['percent']:.1f}",
+            ))
+            for part in mounts
+        )
+    
+    def start_disk_scan(self, path, refresh=False):
+        """开始 (或重新) 分析目录大小; refresh为True时不使用目录缓存, 重新统计所有文件"""
+        path = os.path.abspath(os.path.expanduser(path))
+        if not os.path.isdir(path):
+            dpg.set_value("disk_scan_status", f"Not a directory: {path}")
+            return
+        dpg.set_value("disk_scan_path", path)
+        self.disk_scan_path = path
+        self.scan_table.clear()
+        self.scanner.scan(path, refresh)
+    
+    def on_disk_scan_up(self, sender=None, app_data=None):
+        """分析上一级目录"""
+        self.start_disk_scan(os.path.dirname(dpg.get_value("disk_scan_path")))
+    
+    def update_disk_scan(self):
+        """将扫描线程发布的部分结果刷新到表格"""
+        result = self.scanner.result
+        if result is None or result is self.applied_scan:
+            return
+        self.applied_scan = result
+        
+        # 替换前的扫描可能在切换目录后才发布结果
+        if result.root != self.disk_scan_path:
+            return
+        
+        total = result.files_size + sum(result.children.values())
+        largest = sorted(result.children.items(), key=lambda item: item[1], reverse=True)[:DISK_SCAN_ROWS]
+        self.scan_table.update_rows(
+            (path, (os.path.basename(path) + os.sep, format_size(size), f"{size * 100 / total:.1f}" if total else "0.0"))
+            for path, size in largest
+        )
+        
+        state = "done" if result.done else "scanning..."
+        errors = f", {result.errors} unreadable" if result.errors else ""
+        dpg.set_value(
+            "disk_scan_status",
+            f"{format_size(total)} in {result.dirs_scanned} dirs "
+            f"(files here: {format_size(result.files_size)}{errors}) - {state}"
+        )
+    
     def create_terminal_tab(self):
         """创建终端标签页"""
+        # 每个会话一个子标签页
+        with dpg.tab_bar(tag="terminal_tabs", callback=self.on_terminal_tab_change):
+            dpg.add_tab_button(label="+", trailing=True, callback=self.add_terminal_session)
+        self.add_terminal_session()
+            
+        # 终端输入区域
         with dpg.group(horizontal=True):
+            dpg.add_text("$>", color=(0, 255, 255))
+            dpg.add_input_text(
+                hint="Enter command...",
+                tag="terminal_input",
+                width=-120,
+                callback=self.execute_command,
+                on_enter=True
+            )
+            dpg.add_button(label="^C", callback=self.on_terminal_control, user_data="interrupt")
+            dpg.add_button(label="^Z", callback=self.on_terminal_control, user_data="suspend")
+            dpg.add_button(label="^D", callback=self.on_terminal_control, user_data="send_eof")
+    
+    def add_terminal_session(self, sender=None, app_data=None):
+        """新建一个终端会话标签页"""
+        index = len(self.terminals) + 1
+        output = f"terminal_output_{index}"
+        
+        with dpg.tab(label=f"Shell {index}", parent="terminal_tabs") as tab:
             # 终端输出区域
             with dpg.child_window(width=-1, height=-32):
                 dpg.add_input_text(
                     multiline=True,
                     readonly=True,
-                    tag="terminal_output",
+                    tag=output,
                     width=-1,
                     height=-1,
                     tab_input=True
                 )
-            
-        # 终端输入区域
+        
+        buffer = TerminalBuffer()
+        session = None
+        if self.shell_loop:
+            try:
+                session = ShellSession(buffer)
+                self.shell_loop.add(session)
+            except OSError as e:
+                buffer.write(f"Error starting shell: {e}\n")
+        
+        self.terminals[tab] = {"buffer": buffer, "output": output, "session": session}
+        if self.active_terminal is None or sender is not None:
+            self.active_terminal = self.terminals[tab]
+            dpg.set_value("terminal_tabs", tab)
+    
+    def on_terminal_tab_change(self, sender, app_data):
+        """切换当前终端会话"""
+        if app_data in self.terminals:
+            self.active_terminal = self.terminals[app_data]
+    
+    def on_terminal_control(self, sender, app_data, user_data):
+        """向当前会话发送控制字符"""
+        session = self.active_terminal["session"]
+        if session:
+            getattr(session, user_data)()
+    
+    def create_logs_tab(self):
+        """创建日志查看标签页"""
         with dpg.group(horizontal=True):
-            dpg.add_text("$>", color=(0, 255, 255))
+            dpg.add_text("Log", color=(0, 255, 255))
             dpg.add_input_text(
-                hint="Enter command...",
-                tag="terminal_input",
-                width=-1,
-                callback=self.execute_command,
+                default_value=DEFAULT_LOG_PATH,
+                tag="log_path",
+                width=400,
+                callback=lambda sender, app_data: self.open_log(app_data),
                 on_enter=True
             )
+            dpg.add_button(label="Open", callback=lambda: self.open_log(dpg.get_value("log_path")))
+            dpg.add_checkbox(label="Follow", default_value=True, tag="log_follow", callback=self.on_log_follow)
+            dpg.add_text("", tag="log_status")
+        
+        # 正则搜索: 匹配的行以*标记, 当前匹配以>>标记
+        with dpg.group(horizontal=True):
+            dpg.add_text("Search", color=(0, 255, 255))
+            dpg.add_input_text(
+                hint="regex (case-insensitive)",
+                tag="log_search",
+                width=300,
+                callback=self.on_log_search,
+                on_enter=True
+            )
+            dpg.add_button(label="Prev", callback=self.on_log_match, user_data=-1)
+            dpg.add_button(label="Next", callback=self.on_log_match, user_data=1)
+            dpg.add_text("", tag="log_search_status")
+        
+        dpg.add_slider_int(tag="log_position", width=-1, format="line %d", callback=self.on_log_scroll)
+        with dpg.child_window(width=-1, height=-1):
+            dpg.add_input_text(multiline=True, readonly=True, tag="log_output", width=-1, height=-1)
+    
+    def open_log(self, path):
+        """打开日志文件, 替换当前文件"""
+        path = os.path.abspath(os.path.expanduser(path))
+        try:
+            log = LogFile(path)
+        except OSError as e:
+            dpg.set_value("log_status", f"Error opening log: {e}")
+            return
+        
+        if self.log_file:
+            self.log_file.close()
+        self.log_file = log
+        self.log_top = 0
+        self.log_match = None
+        self.applied_log = None
+        dpg.set_value("log_path", path)
+        self.on_log_search(None, dpg.get_value("log_search"))
+    
+    def on_log_search(self, sender, app_data):
+        """开始新的搜索, 空文本时取消搜索"""
+        self.log_search = None
+        self.log_match = None
+        self.applied_log = None
+        dpg.set_value("log_search_status", "")
+        if not app_data or self.log_file is None:
+            return
+        try:
+            self.log_search = LogSearch(self.log_file, app_data)
+        except re.error as e:
+            dpg.set_value("log_search_status", f"Invalid regex: {e}")
+    
+    def on_log_match(self, sender, app_data, user_data):
+        """跳到下一个 (或上一个) 匹配行"""
+        search = self.log_search
+        if search is None:
+            return
+        line = search.next_match(self.log_top if self.log_match is None else self.log_match, user_data)
+        if line is None:
+            return
+        self.log_match = line
+        self.scroll_log(line - LOG_VIEW_LINES // 4 - self.log_top)
+    
+    def on_log_follow(self, sender, app_data):
+        """切换是否跟随文件末尾"""
+        self.log_follow = app_data
+    
+    def on_log_scroll(self, sender, app_data):
+        """拖动位置滑块"""
+        self.scroll_log(app_data - self.log_top)
+    
+    def on_log_wheel(self, sender, app_data):
+        """鼠标在日志视图上时用滚轮滚动"""
+        if "logs_tab" in self.built_tabs and dpg.is_item_hovered("log_output"):
+            self.scroll_log(-3 * int(app_data))
+    
+    def scroll_log(self, delta):
+        """滚动日志视图, 停止跟随文件末尾"""
+        self.log_top = max(0, self.log_top + delta)
+        self.log_follow = False
+        dpg.set_value("log_follow", False)
+    
+    def update_logs(self):
+        """继续分块搜索, 可见行或索引进度变化时重新渲染视图 (每帧调用)"""
+        log = self.log_file
+        if log is None:
+            return
+        
+        search = self.log_search
+        if search is not None and not search.done:
+            search.step()
+        
+        total = log.line_count()
+        if self.log_follow:
+            self.log_top = max(0, total - LOG_VIEW_LINES)
+        else:
+            self.log_top = min(self.log_top, max(0, total - 1))
+        top = self.log_top
+        
+        state = (
+            log.generation, top, total, log.end, self.log_match,
+            (len(search.matches), search.done) if search else None,
+        )
+        if state == self.applied_log:
+            return
+        if self.applied_log and self.applied_log[0] != log.generation:
+            # 文件被轮转或截断, 原来的匹配行已失效
+            self.log_match = None
+        self.applied_log = state
+        
+        matches = search.visible(top, LOG_VIEW_LINES) if search else ()
+        dpg.set_value("log_output", "\n".join(
+            f"{'>>' if index == self.log_match else '* ' if index in matches else '  '}{index + 1:>9}  {line}"
+            for index, line in enumerate(log.lines(top, LOG_VIEW_LINES), top)
+        ))
+        dpg.configure_item("log_position", max_value=max(0, total - 1))
+        dpg.set_value("log_position", top)
+        
+        indexing = "" if log.indexed else " - indexing..."
+        dpg.set_value("log_status", f"{total:,} lines, {format_size(log.size)}{indexing}")
+        if search:
+            searching = "" if search.done else " - searching..."
+            dpg.set_value("log_search_status", f"{len(search.matches):,} matching lines{searching}")
+    
+    def create_jobs_tab(self):
+        """创建命令任务标签页"""
+        with dpg.child_window(width=-1, height=-1):
+            with dpg.group(horizontal=True):
+                dpg.add_text("$>", color=(0, 255, 255))
+                dpg.add_input_text(
+                    hint="Enter command to run as a job...",
+                    tag="job_command",
+                    width=-260,
+                    callback=self.on_job_submit,
+                    on_enter=True
+                )
+                dpg.add_button(label="Run", callback=self.on_job_submit)
+                dpg.add_button(label="Cancel", callback=self.on_job_cancel, user_data=False)
+                dpg.add_button(label="Kill", callback=self.on_job_cancel, user_data=True)
+            dpg.add_text("", tag="job_status")
+            
+            with dpg.table(
+                header_row=True,
+                borders_innerH=True,
+                borders_outerH=True,
+                borders_innerV=True,
+                borders_outerV=True,
+                row_background=True,
+                resizable=True,
+                scrollY=True,
+                freeze_rows=1,
+                height=220,
+                tag="jobs_table"
+            ):
+                dpg.add_table_column(label="ID", init_width_or_weight=0.06)
+                dpg.add_table_column(label="Command", init_width_or_weight=0.5)
+                dpg.add_table_column(label="State", init_width_or_weight=0.1)
+                dpg.add_table_column(label="Exit", init_width_or_weight=0.08)
+                dpg.add_table_column(label="Runtime", init_width_or_weight=0.12)
+                dpg.add_table_column(label="Output", init_width_or_weight=0.14)
+            
+            dpg.add_separator()
+            
+            # 选中任务的输出, 按页读取
+            with dpg.group(horizontal=True):
+                dpg.add_text("Output", color=(0, 255, 255))
+                dpg.add_button(label="<<", callback=self.on_job_page, user_data="first")
+                dpg.add_button(label="<", callback=self.on_job_page, user_data="prev")
+                dpg.add_button(label=">", callback=self.on_job_page, user_data="next")
+                dpg.add_button(label=">>", callback=self.on_job_page, user_data="last")
+                dpg.add_text("", tag="job_page_status")
+            dpg.add_input_text(multiline=True, readonly=True, tag="job_output", width=-1, height=-1)
+    
+    def on_job_submit(self, sender=None, app_data=None):
+        """提交命令任务并选中它"""
+        command = dpg.get_value("job_command").strip()
+        dpg.set_value("job_command", "")
+        if command:
+            self.on_job_select(self.jobs.submit(command).id)
+    
+    def on_job_select(self, job_id):
+        """选中任务, 显示其输出的最后一页"""
+        self.selected_job = job_id
+        self.job_follow = True
+        self.applied_job_page = None
+    
+    def on_job_cancel(self, sender, app_data, user_data):
+        """取消 (或强制结束) 选中的任务"""
+        if self.selected_job is None:
+            return
+        if user_data:
+            self.jobs.kill(self.selected_job)
+        else:
+            self.jobs.cancel(self.selected_job)
+    
+    def on_job_page(self, sender, app_data, user_data):
+        """翻页; 翻到最后一页时跟随新输出"""
+        job = self.jobs.jobs.get(self.selected_job)
+        if job is None:
+            return
+        last = job.output.pages - 1
+        page = {"first": 0, "prev": self.job_page - 1, "next": self.job_page + 1, "last": last}[user_data]
+        self.job_page = min(max(0, page), last)
+        self.job_follow = self.job_page == last
+    
+    def update_jobs(self):
+        """任务状态变化时刷新任务表, 选中任务的当前页变化时重新读取 (每帧调用)"""
+        jobs = self.jobs
+        running = jobs.running
+        
+        # 有任务运行时每秒刷新一次运行时长和输出大小
+        state = (jobs.version, int(time.monotonic()) if running else None)
+        if state != self.applied_jobs:
+            self.applied_jobs = state
+            self.jobs_table.update_rows(
+                (job.id, (
+                    str(job.id),
+                    job.command,
+                    job.state,
+                    "" if job.exit_code is None else str(job.exit_code),
+                    "" if job.runtime is None else f"{job.runtime:.1f}s",
+                    format_size(job.output.size),
+                ))
+                for job in reversed(jobs.jobs.values())
+            )
+            queued = sum(1 for job in jobs.jobs.values() if job.state == QUEUED)
+            dpg.set_value("job_status", f"{running}/{jobs.workers} running, {queued} queued")
+        
+        job = jobs.jobs.get(self.selected_job)
+        if job is None:
+            return
+        output = job.output
+        pages = output.pages
+        if self.job_follow:
+            self.job_page = pages - 1
+        
+        # 只有最后两页的内容会随新输出变化
+        page_state = (job.id, self.job_page, output.size if self.job_page >= pages - 2 else None)
+        if page_state == self.applied_job_page:
+            return
+        self.applied_job_page = page_state
+        
+        dpg.set_value("job_output", output.page(self.job_page))
+        spilled = ", spilled to disk" if output.spilled else ""
+        dropped = f", {format_size(output.dropped)} dropped" if output.dropped else ""
+        dpg.set_value(
+            "job_page_status",
+            f"job {job.id}: page {self.job_page + 1}/{pages} ({format_size(output.size)}{spilled}{dropped})"
+        )
     
     def create_process_monitor_tab(self):
         """创建进程监控标签页"""
         with dpg.child_window(width=-1, height=-1):
-            dpg.add_text("Running Processes", color=(0, 255, 255))
+            with dpg.group(horizontal=True):
+                dpg.add_text("Running Processes", color=(0, 255, 255))
+                dpg.add_checkbox(
+                    label="Show all",
+                    tag="process_show_all",
+                    callback=self.on_process_show_all
+                )
+                dpg.add_checkbox(
+                    label="Tree",
+                    tag="process_tree_mode",
+                    callback=self.on_process_tree_mode
+                )
+            
+            # 过滤框: 每次按键都用采集器维护的索引重新选择
+            with dpg.group(horizontal=True):
+                dpg.add_text("Filter:", color=(0, 255, 255))
+                dpg.add_input_text(
+                    hint="name  name:prefix  re:regex  user:root  status:run  cpu>5  mem>1G",
+                    tag="process_filter",
+                    width=-300,
+                    callback=self.on_process_filter
+                )
+                dpg.add_text("", tag="process_filter_status")
             dpg.add_separator()
             
             # 进程列表
@@ -261,15 +951,32 @@ class PyDexUI:
                 reorderable=True,
                 hideable=True,
                 sortable=True,
+                callback=self.on_process_sort,
                 tag="process_table"
             ):
-                dpg.add_table_column(label="PID", init_width_or_weight=0.1)
-                dpg.add_table_column(label="Name", init_width_or_weight=0.3)
-                dpg.add_table_column(label="Status", init_width_or_weight=0.1)
-                dpg.add_table_column(label="CPU %", init_width_or_weight=0.1)
-                dpg.add_table_column(label="Memory %", init_width_or_weight=0.1)
-                dpg.add_table_column(label="Memory (MB)", init_width_or_weight=0.15)
-                dpg.add_table_column(label="User", init_width_or_weight=0.15)
+                dpg.add_table_column(label="PID", init_width_or_weight=0.1, tag="process_col_pid")
+                dpg.add_table_column(label="Name", init_width_or_weight=0.3, tag="process_col_name")
+                dpg.add_table_column(label="Status", init_width_or_weight=0.1, tag="process_col_status")
+                dpg.add_table_column(label="CPU %", init_width_or_weight=0.1, tag="process_col_cpu_percent",
+                                     default_sort=True, prefer_sort_descending=True)
+                dpg.add_table_column(label="Memory %", init_width_or_weight=0.1, tag="process_col_memory_percent",
+                                     prefer_sort_descending=True)
+                dpg.add_table_column(label="Memory (MB)", init_width_or_weight=0.15, tag="process_col_rss",
+                                     prefer_sort_descending=True)
+                dpg.add_table_column(label="User", init_width_or_weight=0.15, tag="process_col_username")
+            dpg.add_slider_int(tag="process_position", width=-1, format="process %d", callback=self.on_process_scroll)
+            
+            # 选中进程的历史, 数据来自采集器的逐进程环形缓冲区
+            with dpg.group(horizontal=True):
+                dpg.add_text("Select a process to see its history", tag="process_detail_title", color=(0, 255, 255))
+                dpg.add_checkbox(label="Pin", tag="process_detail_pin", callback=self.on_process_pin)
+            with dpg.group(horizontal=True):
+                for key, label, series in PROCESS_DETAIL_PLOTS:
+                    with dpg.plot(label=label, height=220, width=290, no_mouse_pos=True):
+                        dpg.add_plot_axis(dpg.mvXAxis, time=True, no_gridlines=True, tag=f"process_detail_{key}_x")
+                        with dpg.plot_axis(dpg.mvYAxis, no_gridlines=True, tag=f"process_detail_{key}_y"):
+                            for name in series:
+                                dpg.add_line_series([], [], label=name, tag=f"process_detail_{name}")
     
     def create_status_bar(self):
         """创建底部状态栏"""
@@ -278,195 +985,430 @@ class PyDexUI:
             dpg.add_text(" | Uptime: ", tag="system_uptime")
             dpg.add_text(" | Time: ", tag="current_time")
             dpg.add_text(" | PyDEX-UI v1.0", tag="app_version")
+            dpg.add_button(label="Profiler", small=True, callback=self.toggle_profiler)
+            dpg.add_text("", tag="alert_status", color=(255, 80, 80))
+    
+    def create_profiler_overlay(self):
+        """创建性能分析叠加层 (F12切换)"""
+        with dpg.window(
+            label="PyDEX-UI Profiler",
+            tag="profiler_window",
+            show=False,
+            width=640,
+            height=420,
+            pos=(40, 40)
+        ):
+            with dpg.group(horizontal=True):
+                dpg.add_button(label="Dump to file", callback=self.dump_profile)
+                dpg.add_text("", tag="profiler_dump_path")
+            dpg.add_separator()
+            dpg.add_text("", tag="profiler_text")
+    
+    def toggle_profiler(self, sender=None, app_data=None):
+        """显示或隐藏性能分析叠加层"""
+        dpg.configure_item("profiler_window", show=not dpg.is_item_shown("profiler_window"))
+        self.last_profile_refresh = 0.0
+    
+    def dump_profile(self, sender=None, app_data=None):
+        """将性能统计写入文件"""
+        try:
+            path = PROFILER.dump()
+            dpg.set_value("profiler_dump_path", f"Saved to {path}")
+        except OSError as e:
+            dpg.set_value("profiler_dump_path", f"Error: {e}")
+    
+    def refresh_profiler(self):
+        """每秒采样一次RSS, 叠加层可见时刷新统计文本"""
+        now = time.monotonic()
+        if now - self.last_profile_refresh < 1.0:
+            return
+        self.last_profile_refresh = now
+        
+        PROFILER.sample_rss()
+        if dpg.is_item_shown("profiler_window"):
+            dpg.set_value("profiler_text", PROFILER.format_report())
+    
+    def update_all_data(self):
+        """将最新快照中有更新的采集项应用到界面 (每帧调用)"""
+        with PROFILER.section("flush_terminal"):
+            self.flush_terminal()
+        self.update_disk_scan()
+        if self.stored_history is not None:
+            self.apply_stored_history()
+        if self.store_queries:
+            self.apply_store_queries()
+        self.update_alerts()
+        if self.active_tab == "logs_tab":
+            with PROFILER.section("update_logs"):
+                self.update_logs()
+        elif self.active_tab == "jobs_tab":
+            with PROFILER.section("update_jobs"):
+                self.update_jobs()
+        self.update_throttle()
+        self.refresh_profiler()
+        
+        snapshot = self.collector.latest
+        if snapshot is None or snapshot is self.applied_snapshot:
+            return
+        self.applied_snapshot = snapshot
+        
+        changed = {
+            name for name, version in snapshot.versions.items()
+            if self.applied_versions.get(name) != version and getattr(snapshot, name) is not None
+        }
+        self.applied_versions = snapshot.versions
+        
+        for name, handler in self.snapshot_handlers:
+            tab = HANDLER_TABS.get(name)
+            if name in changed and (tab is None or tab in self.built_tabs):
+                try:
+                    with PROFILER.section(handler.__name__):
+                        handler(getattr(snapshot, name), snapshot.times[name])
+                except Exception as e:
+                    print(f"Error in {handler.__name__}: {e}")
+    
+    def update_alerts(self):
+        """告警状态变化时刷新状态栏"""
+        alerts = self.collector.alerts
+        if alerts is None or alerts.version == self.applied_alerts:
+            return
+        self.applied_alerts = alerts.version
+        
+        firing = alerts.firing
+        text = ", ".join(
+            f"{alert.rule}{f' [{alert.subject}]' if alert.subject else ''} ({alert.value:.1f})"
+            for alert in firing[:3]
+        )
+        if len(firing) > 3:
+            text += f" +{len(firing) - 3} more"
+        dpg.set_value("alert_status", f" | ALERTS: {text}" if firing else "")
+    
+    def on_main_tab_change(self, sender, app_data):
+        """切换主标签页时调整各采集项的采样间隔"""
+        alias = dpg.get_item_alias(app_data)
+        self.build_tab(alias)
+        self.active_tab = alias
+        self.collector.set_visible(TAB_PROBES.get(alias, PROBES))
     
-    def update_all_data(self, sender, app_data):
-        """更新所有系统数据"""
-        self.update_cpu_info()
-        self.update_memory_info()
-        self.update_disk_info()
-        self.update_network_info()
-        self.update_process_list()
-        self.update_status_bar()
+    def on_user_input(self, sender, app_data):
+        """记录最近一次用户输入的时间"""
+        self.last_input_time = time.monotonic()
+    
+    def update_throttle(self):
+        """视口最小化或长时间无输入时整体降低采样频率"""
+        if dpg.get_viewport_client_width() == 0 or dpg.get_viewport_client_height() == 0:
+            throttle = MINIMIZED_THROTTLE
+        elif time.monotonic() - self.last_input_time > IDLE_SECONDS:
+            throttle = IDLE_THROTTLE
+        else:
+            throttle = 1.0
         
-        # 设置下一帧更新
-        dpg.set_frame_callback(dpg.get_frame_count() + 30, self.update_all_data)
+        if throttle != self.collector.throttle:
+            restored = throttle < self.collector.throttle
+            self.collector.throttle = throttle
+            if restored:
+                self.collector.request_refresh()
     
-    def update_cpu_info(self):
+    def update_cpu_info(self, cpu, timestamp):
         """更新CPU信息"""
-        cpu_percent = psutil.cpu_percent(interval=None)
-        cpu_freq = psutil.cpu_freq()
-        cpu_count = psutil.cpu_count()
+        cpu_percent = cpu["percent"]
         
         # 更新进度条和文本
         dpg.set_value("cpu_usage_bar", cpu_percent / 100)
         dpg.configure_item("cpu_usage_bar", overlay=f"{cpu_percent:.1f}%")
-        dpg.set_value("cpu_cores", f"Cores: {cpu_count} (Logical: {psutil.cpu_count(logical=True)})")
+        dpg.set_value("cpu_cores", f"Cores: {cpu['count']} (Logical: {cpu['logical']})")
         
-        if cpu_freq:
-            dpg.set_value("cpu_freq", f"Frequency: {cpu_freq.current:.0f} MHz")
+        if cpu["freq"]:
+            dpg.set_value("cpu_freq", f"Frequency: {cpu['freq']:.0f} MHz")
         
         # 更新历史图表
-        self.cpu_history.append(cpu_percent)
-        if len(self.cpu_history) > 100:
-            self.cpu_history.pop(0)
+        self.cpu_history.append(timestamp, cpu_percent)
+        self.refresh_history_plot(*self.history_plots[0])
         
-        if len(self.cpu_history) > 1:
-            dpg.set_value("cpu_plot", [list(range(len(self.cpu_history))), list(self.cpu_history)])
+        # 逐核热力图
+        percpu = cpu.get("percpu")
+        if percpu and "devices_tab" in self.built_tabs:
+            self.update_device_heatmap("cpu", tuple(f"CPU{i}" for i in range(len(percpu))), percpu, 100.0)
     
-    def update_memory_info(self):
+    def update_memory_info(self, memory, timestamp):
         """更新内存信息"""
-        memory = psutil.virtual_memory()
-        memory_percent = memory.percent
+        memory_percent = memory["percent"]
         
         # 更新进度条和文本
         dpg.set_value("memory_usage_bar", memory_percent / 100)
         dpg.configure_item("memory_usage_bar", overlay=f"{memory_percent:.1f}%")
         
-        used_gb = memory.used / (1024 ** 3)
-        available_gb = memory.available / (1024 ** 3)
-        total_gb = memory.total / (1024 ** 3)
+        used_gb = memory["used"] / (1024 ** 3)
+        available_gb = memory["available"] / (1024 ** 3)
+        total_gb = memory["total"] / (1024 ** 3)
         
         dpg.set_value("memory_used", f"Used: {used_gb:.1f} GB / {total_gb:.1f} GB")
         dpg.set_value("memory_available", f"Available: {available_gb:.1f} GB")
         
         # 更新历史图表
-        self.memory_history.append(memory_percent)
-        if len(self.memory_history) > 100:
-            self.memory_history.pop(0)
-            
-        if len(self.memory_history) > 1:
-            dpg.set_value("memory_plot", [list(range(len(self.memory_history))), list(self.memory_history)])
+        self.memory_history.append(timestamp, memory_percent)
+        self.refresh_history_plot(*self.history_plots[1])
     
-    def update_disk_info(self):
+    def update_disk_info(self, disk, timestamp):
         """更新磁盘信息"""
-        try:
-            disk = psutil.disk_usage('/')
-            disk_percent = disk.percent
-            
-            # 更新进度条和文本
-            dpg.set_value("disk_usage_bar", disk_percent / 100)
-            dpg.configure_item("disk_usage_bar", overlay=f"{disk_percent:.1f}%")
-            
-            used_gb = disk.used / (1024 ** 3)
-            free_gb = disk.free / (1024 ** 3)
-            total_gb = disk.total / (1024 ** 3)
-            
-            dpg.set_value("disk_used", f"Used: {used_gb:.1f} GB / {total_gb:.1f} GB")
-            dpg.set_value("disk_free", f"Free: {free_gb:.1f} GB")
-            
-            # 更新磁盘I/O图表
-            current_disk_io = psutil.disk_io_counters()
-            current_time = time.time()
-            
-            if self.last_disk_io and current_disk_io:
-                time_diff = current_time - self.last_disk_time
-                read_speed = (current_disk_io.read_bytes - self.last_disk_io.read_bytes) / time_diff / 1024
-                write_speed = (current_disk_io.write_bytes - self.last_disk_io.write_bytes) / time_diff / 1024
-                
-                self.disk_history.append((read_speed, write_speed))
-                if len(self.disk_history) > 100:
-                    self.disk_history.pop(0)
-                
-                if len(self.disk_history) > 1:
-                    times = list(range(len(self.disk_history)))
-                    reads = [point[0] for point in self.disk_history]
-                    writes = [point[1] for point in self.disk_history]
-                    
-                    dpg.set_value("disk_read_plot", [times, reads])
-                    dpg.set_value("disk_write_plot", [times, writes])
-            
-            self.last_disk_io = current_disk_io
-            self.last_disk_time = current_time
-            
-        except Exception as e:
-            print(f"Error updating disk info: {e}")
+        if not disk:
+            return
+        
+        disk_percent = disk["percent"]
+        
+        # 更新进度条和文本
+        dpg.set_value("disk_usage_bar", disk_percent / 100)
+        dpg.configure_item("disk_usage_bar", overlay=f"{disk_percent:.1f}%")
+        
+        used_gb = disk["used"] / (1024 ** 3)
+        free_gb = disk["free"] / (1024 ** 3)
+        total_gb = disk["total"] / (1024 ** 3)
+        
+        dpg.set_value("disk_used", f"Used: {used_gb:.1f} GB / {total_gb:.1f} GB")
+        dpg.set_value("disk_free", f"Free: {free_gb:.1f} GB")
+        
+        # 更新磁盘I/O图表
+        if disk["read_speed"] is not None:
+            self.disk_history.append(timestamp, disk["read_speed"], disk["write_speed"])
+            self.refresh_history_plot(*self.history_plots[3])
+        
+        # 逐盘热力图: 读写合计
+        devices = disk.get("devices")
+        if devices and "devices_tab" in self.built_tabs:
+            totals = [read + write for read, write in zip(devices["read"], devices["write"])]
+            self.update_device_heatmap("disk", tuple(devices["names"]), totals)
     
-    def update_network_info(self):
+    def update_network_info(self, network, timestamp):
         """更新网络信息"""
+        if not network or network["upload_speed"] is None:
+            return
+        
+        upload_speed = network["upload_speed"]
+        download_speed = network["download_speed"]
+        
+        # 更新网络速度文本
+        dpg.set_value("network_upload", f"Upload: {upload_speed:.1f} KB/s")
+        dpg.set_value("network_download", f"Download: {download_speed:.1f} KB/s")
+        
+        # 更新网络I/O图表
+        self.network_history.append(timestamp, upload_speed, download_speed)
+        self.refresh_history_plot(*self.history_plots[2])
+        
+        # 逐网卡热力图: 收发合计
+        nics = network.get("nics")
+        if nics and "devices_tab" in self.built_tabs:
+            totals = [up + down for up, down in zip(nics["upload"], nics["download"])]
+            self.update_device_heatmap("nic", tuple(nics["names"]), totals)
+    
+    def update_connection_info(self, connections, timestamp):
+        """更新网络连接数"""
+        states = connections["states"]
+        dpg.set_value("network_connections", f"Connections: {connections['total']}")
+        dpg.set_value(
+            "network_connection_states",
+            f"EST {states.get('ESTABLISHED', 0)} | TW {states.get('TIME_WAIT', 0)} | "
+            f"LISTEN {states.get('LISTEN', 0)}"
+        )
+    
+    def read_stored_history(self):
+        """读取内存历史可容纳的最近数据 (后台线程), 返回与history_plots对应的 (xs, [ys...])"""
+        now = time.time()
+        result = []
+        for history, _, _, _, (probe, fields) in self.history_plots:
+            store = self.store.series[probe]
+            try:
+                result.append(store.read_columns(
+                    now - HISTORY_SECONDS, now, [fields[name] for name in history.series]
+                ))
+            except OSError as e:
+                print(f"Error loading history: {e}")
+                result.append(None)
+        return result
+    
+    def apply_stored_history(self):
+        """后台读取完成后, 将持久化的数据补到内存历史中已有样本之前 (每帧调用)"""
+        if not self.stored_history.done():
+            return
+        future, self.stored_history = self.stored_history, None
+        if future.cancelled():
+            return
+        for entry, columns in zip(self.history_plots, future.result()):
+            if columns is not None:
+                entry[0].prepend(*columns)
+                self.refresh_history_plot(*entry, force=True)
+    
+    def refresh_history_plot(self, history, plot, x_axis, series, source, force=False):
+        """按当前窗口和图表像素宽度刷新历史图表"""
+        if len(history) < 2:
+            return
+        
         try:
-            current_net_io = psutil.net_io_counters()
-            current_time = time.time()
-            
-            if self.last_net_io and current_net_io:
-                time_diff = current_time - self.last_net_time
-                upload_speed = (current_net_io.bytes_sent - self.last_net_io.bytes_sent) / time_diff / 1024
-                download_speed = (current_net_io.bytes_recv - self.last_net_io.bytes_recv) / time_diff / 1024
-                
-                # 更新网络速度文本
-                dpg.set_value("network_upload", f"Upload: {upload_speed:.1f} KB/s")
-                dpg.set_value("network_download", f"Download: {download_speed:.1f} KB/s")
-                
-                # 更新网络连接数
-                try:
-                    connections = len(psutil.net_connections())
-                    dpg.set_value("network_connections", f"Connections: {connections}")
-                except:
-                    dpg.set_value("network_connections", "Connections: N/A")
-                
-                # 更新网络I/O图表
-                self.network_history.append((upload_speed, download_speed))
-                if len(self.network_history) > 100:
-                    self.network_history.pop(0)
-                
-                if len(self.network_history) > 1:
-                    times = list(range(len(self.network_history)))
-                    uploads = [point[0] for point in self.network_history]
-                    downloads = [point[1] for point in self.network_history]
-                    
-                    dpg.set_value("network_upload_plot", [times, uploads])
-                    dpg.set_value("network_download_plot", [times, downloads])
+            width = dpg.get_item_rect_size(plot)[0] or 600
+        except Exception:
+            width = 600
+        
+        end = history.timestamps.latest()
+        start = end - self.history_window
+        
+        if self.store and history.timestamps.last()[0] > start:
+            # 窗口超出内存历史: 在后台线程从磁盘降采样, 完成后由apply_store_queries绘制;
+            # 每个像素对应的时间内最多查询一次, 同一图表同时只有一个查询
+            now = time.monotonic()
+            pending = self.store_queries.get(plot)
+            if pending is not None and not pending[0].done():
+                if not force:
+                    return
+                pending[0].cancel()
+            if not force and now - self.store_refresh.get(plot, 0.0) < max(1.0, self.history_window / width):
+                return
+            self.store_refresh[plot] = now
             
-            self.last_net_io = current_net_io
-            self.last_net_time = current_time
+            probe, fields = source
+            store = self.store.series[probe]
+            future = self.store_pool.submit(store.query, start, end, width)
+            self.store_queries[plot] = (future, store, fields, series, x_axis, start, end)
+            return
+        
+        xs, ys = history.plot_data(self.history_window, width)
+        for name, tag in series.items():
+            dpg.set_value(tag, [xs, ys[name]])
+        dpg.set_axis_limits(x_axis, start, end)
+    
+    def apply_store_queries(self):
+        """绘制已完成的磁盘历史查询 (每帧调用)"""
+        for plot, (future, store, fields, series, x_axis, start, end) in list(self.store_queries.items()):
+            if not future.done():
+                continue
+            del self.store_queries[plot]
             
-        except Exception as e:
-            print(f"Error updating network info: {e}")
+            # 查询期间切换了历史窗口, 结果已过期
+            if future.cancelled() or end - start != self.history_window:
+                continue
+            try:
+                xs, columns = future.result()
+            except OSError as e:
+                print(f"Error reading history: {e}")
+                continue
+            for name, tag in series.items():
+                dpg.set_value(tag, [xs, columns[store.fields.index(fields[name])]])
+            dpg.set_axis_limits(x_axis, start, end)
     
-    def update_process_list(self):
+    def on_history_window_change(self, sender, app_data):
+        """切换历史窗口"""
+        self.history_window = dict(HISTORY_WINDOWS)[app_data]
+        for entry in self.history_plots:
+            self.refresh_history_plot(*entry, force=True)
+    
+    def update_process_list(self, processes, timestamp):
         """更新进程列表"""
         try:
-            # 清除现有进程行
-            if dpg.does_item_exist("process_table"):
-                dpg.delete_item("process_table", children_only=True)
-            
-            # 获取进程信息
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'status', 'cpu_percent', 'memory_percent', 'memory_info', 'username']):
-                try:
-                    processes.append(proc.info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass
-            
-            # 按CPU使用率排序
-            processes.sort(key=lambda x: x['cpu_percent'] or 0, reverse=True)
-            
-            # 只显示前50个进程
-            for proc in processes[:50]:
-                with dpg.table_row(parent="process_table"):
-                    dpg.add_text(str(proc['pid']))
-                    dpg.add_text(proc['name'] or "N/A")
-                    dpg.add_text(proc['status'] or "N/A")
-                    dpg.add_text(f"{proc['cpu_percent'] or 0:.1f}" if proc['cpu_percent'] else "0.0")
-                    dpg.add_text(f"{proc['memory_percent'] or 0:.1f}" if proc['memory_percent'] else "0.0")
-                    
-                    memory_mb = proc['memory_info'].rss / (1024 * 1024) if proc['memory_info'] else 0
-                    dpg.add_text(f"{memory_mb:.1f}")
-                    
-                    dpg.add_text(proc['username'] or "N/A")
-                    
+            # 切换模式后旧模式的快照可能还未被替换
+            if processes and ("depth" in processes[0]) != self.process_table.tree_mode:
+                return
+            self.process_table.update(processes)
+            self.update_process_position()
+            PROFILER.count("widgets.process_table", self.process_table.cell_updates)
+            if self.selected_pid is not None:
+                self.refresh_process_detail()
         except Exception as e:
             print(f"Error updating process list: {e}")
     
-    def update_status_bar(self):
+    def update_process_position(self):
+        """同步进程表格的位置滑块"""
+        table = self.process_table
+        dpg.configure_item("process_position", max_value=table.max_top)
+        dpg.set_value("process_position", table.top)
+    
+    def on_process_scroll(self, sender, app_data):
+        """拖动进程表格的位置滑块"""
+        self.process_table.scroll(app_data)
+    
+    def on_process_wheel(self, sender, app_data):
+        """鼠标在进程表格上时用滚轮滚动"""
+        if "process_tab" in self.built_tabs and dpg.is_item_hovered("process_table"):
+            table = self.process_table
+            table.scroll(table.top - 3 * int(app_data))
+            self.update_process_position()
+    
+    def on_process_show_all(self, sender, app_data):
+        """切换显示全部进程或前50个进程"""
+        self.collector.process_limit = None if app_data else 50
+        self.collector.request_reselect()
+    
+    def on_process_select(self, pid):
+        """选中进程: 开始跟踪其历史并刷新详情"""
+        history = self.collector.process_history
+        self.selected_pid = pid
+        history.selected = pid
+        
+        proc = self.process_table.find(pid)
+        name = (proc['name'] or "") if proc else ""
+        dpg.set_value("process_detail_title", f"PID {pid} {name}")
+        dpg.set_value("process_detail_pin", pid in history.pinned)
+        self.update_process_position()
+        self.refresh_process_detail()
+    
+    def on_process_pin(self, sender, app_data):
+        """固定或取消固定选中的进程"""
+        if self.selected_pid is None:
+            dpg.set_value(sender, False)
+            return
+        history = self.collector.process_history
+        if app_data:
+            history.pinned = history.pinned | {self.selected_pid}
+        else:
+            history.pinned = history.pinned - {self.selected_pid}
+    
+    def refresh_process_detail(self):
+        """从逐进程历史刷新详情图表"""
+        history = self.collector.process_history.get(self.selected_pid)
+        if history is None or len(history) == 0:
+            for _, _, series in PROCESS_DETAIL_PLOTS:
+                for name in series:
+                    dpg.set_value(f"process_detail_{name}", [[], []])
+            return
+        
+        xs, ys = history.plot_data(PROCESS_DETAIL_SECONDS, 290)
+        for key, _, series in PROCESS_DETAIL_PLOTS:
+            for name in series:
+                dpg.set_value(f"process_detail_{name}", [xs, ys[name]])
+            dpg.fit_axis_data(f"process_detail_{key}_x")
+            dpg.fit_axis_data(f"process_detail_{key}_y")
+    
+    def on_process_filter(self, sender, app_data):
+        """过滤表达式变化时立即重新选择"""
+        try:
+            self.collector.set_filter(app_data)
+            dpg.set_value("process_filter_status", "")
+        except ValueError as e:
+            dpg.set_value("process_filter_status", str(e))
+    
+    def on_process_tree_mode(self, sender, app_data):
+        """切换平铺列表和进程树"""
+        self.collector.tree_mode = app_data
+        self.process_table.tree_mode = app_data
+        self.process_table.clear()
+        self.collector.request_refresh("processes")
+    
+    def on_process_sort(self, sender, app_data):
+        """表头排序回调"""
+        if not app_data:
+            return
+        
+        column, direction = app_data[0]
+        alias = dpg.get_item_alias(column) or ""
+        field = alias.replace("process_col_", "", 1)
+        if field in SORT_FIELDS:
+            self.collector.process_sorter.set_sort(field, direction < 0)
+            self.collector.request_reselect()
+    
+    def update_status_bar(self, status, timestamp):
         """更新状态栏"""
         # 系统信息
-        system = f"{platform.system()} {platform.release()}"
-        dpg.set_value("system_info", f"System: {system}")
+        dpg.set_value("system_info", f"System: {status['system']}")
         
         # 系统运行时间
-        boot_time = psutil.boot_time()
-        uptime_seconds = time.time() - boot_time
-        uptime_str = time.strftime("%H:%M:%S", time.gmtime(uptime_seconds))
+        uptime_str = time.strftime("%H:%M:%S", time.gmtime(status["uptime"]))
         dpg.set_value("system_uptime", f" | Uptime: {uptime_str}")
         
         # 当前时间
@@ -481,65 +1423,157 @@ class PyDexUI:
         if not command.strip():
             return
         
-        # 添加命令到终端输出
-        current_output = dpg.get_value("terminal_output")
-        new_output = f"{current_output}\n$ {command}"
-        dpg.set_value("terminal_output", new_output)
+        terminal = self.active_terminal
+        terminal["buffer"].scroll_offset = 0
         
-        # 在新线程中执行命令
-        thread = threading.Thread(target=self._run_command, args=(command,))
-        thread.daemon = True
-        thread.start()
-    
-    def _run_command(self, command):
-        """在新线程中运行命令"""
-        try:
-            # 创建子进程执行命令
-            process = subprocess.Popen(
-                command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
-            
-            # 实时读取输出
-            for line in iter(process.stdout.readline, ''):
-                if line:
-                    # 在主线程中更新GUI
-                    current_output = dpg.get_value("terminal_output")
-                    dpg.set_value("terminal_output", current_output + line)
-            
-            process.stdout.close()
-            return_code = process.wait()
-            
-            # 添加命令完成提示
-            if return_code == 0:
-                completion_text = f"\n[Command completed with exit code {return_code}]"
+        # 持久会话: 伪终端会回显命令
+        session = terminal["session"]
+        if session and session.alive:
+            session.send(command + "\n")
+            return
+        
+        # 无伪终端时退回到逐条命令执行, 作为任务运行; 输出同时写入终端缓冲区
+        buffer = terminal["buffer"]
+        buffer.write(f"$ {command}\n")
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")("replace"), translate=True)
+        
+        def on_exit(job):
+            buffer.write(decoder.decode(b"", final=True))
+            if job.state == DONE:
+                buffer.write(f"[Command completed with exit code {job.exit_code}]\n")
+            elif job.exit_code is None:
+                buffer.write(f"[Command {job.state}]\n")
+            elif job.state == KILLED:
+                buffer.write(f"[Command killed with exit code {job.exit_code}]\n")
             else:
-                completion_text = f"\n[Command failed with exit code {return_code}]"
-            
-            current_output = dpg.get_value("terminal_output")
-            dpg.set_value("terminal_output", current_output + completion_text)
-            
-        except Exception as e:
-            error_msg = f"\nError executing command: {str(e)}"
-            current_output = dpg.get_value("terminal_output")
-            dpg.set_value("terminal_output", current_output + error_msg)
+                buffer.write(f"[Command failed with exit code {job.exit_code}]\n")
+        
+        self.jobs.submit(command, on_output=lambda data: buffer.write(decoder.decode(data)), on_exit=on_exit)
+    
+    def flush_terminal(self):
+        """将各终端缓冲区的可见窗口刷新到界面 (渲染线程)"""
+        for terminal in self.terminals.values():
+            if terminal["buffer"].drain():
+                dpg.set_value(terminal["output"], terminal["buffer"].text())
+    
+    def on_terminal_scroll(self, sender, app_data, user_data):
+        """PageUp/PageDown滚动终端回滚缓冲区"""
+        terminal = self.active_terminal
+        if terminal is None:
+            return
+        terminal["buffer"].scroll(user_data * (terminal["buffer"].view_lines // 2))
+        dpg.set_value(terminal["output"], terminal["buffer"].text())
     
     def run(self):
-        """运行应用"""
-        dpg.start_dearpygui()
+        """运行应用: 手动渲染循环, 每帧应用最新快照"""
+        last_frame = time.perf_counter()
+        while dpg.is_dearpygui_running():
+            # 手动循环中DPG不再捕获异常, 出错时打印并继续渲染
+            try:
+                with PROFILER.section("update_all_data"):
+                    self.update_all_data()
+            except Exception as e:
+                print(f"Error updating UI: {e}")
+            dpg.render_dearpygui_frame()
+            if self.ready_state != "ready":
+                self.check_ready()
+            
+            now = time.perf_counter()
+            PROFILER.record("frame", (now - last_frame) * 1000)
+            last_frame = now
+    
+    def check_ready(self):
+        """首帧和首批CPU数据显示后记录启动阶段并关闭启动画面"""
+        now = time.monotonic()
+        if self.ready_state is None:
+            STARTUP.mark("first_frame")
+            self.ready_state = "frame"
+            self.first_frame_time = now
+        
+        snapshot = self.applied_snapshot
+        if snapshot is not None and snapshot.cpu is not None:
+            STARTUP.mark("first_data")
+        elif now - self.first_frame_time < SPLASH_TIMEOUT:
+            return
+        
+        self.ready_state = "ready"
+        close_splash()
+        if self.startup_profile:
+            print(STARTUP.format_report())
     
     def cleanup(self):
         """清理资源"""
+        close_splash()
+        self.collector.stop()
+        self.scanner.cancel()
+        if self.store_pool:
+            self.store_pool.shutdown(wait=False, cancel_futures=True)
+        if self.log_file:
+            self.log_file.close()
+        self.jobs.shutdown()
+        if self.shell_loop:
+            self.shell_loop.stop()
         dpg.destroy_context()
 
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="PyDEX-UI system monitor")
+    parser.add_argument("--headless", action="store_true",
+                        help="run only the collector and stream snapshots")
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS,
+                        help="headless stream address, host:port or unix:/path")
+    parser.add_argument("--connect", metavar="ADDRESS",
+                        help="attach the GUI to a collector instead of sampling locally")
+    parser.add_argument("--history-dir", default=default_store_dir(),
+                        help="directory for persistent metric history")
+    parser.add_argument("--no-history", action="store_true",
+                        help="do not persist metric history to disk")
+    parser.add_argument("--alert-rules", metavar="FILE",
+                        help="JSON file with alert rules (default: built-in rules)")
+    parser.add_argument("--alert-log", default=default_alert_log(),
+                        help="file that firing and resolved alerts are appended to")
+    parser.add_argument("--jobs", type=int, default=JOB_WORKERS,
+                        help="maximum number of commands run concurrently as jobs")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print the time spent in each startup phase")
+    return parser.parse_args()
+
+def open_store(args):
+    """打开持久化历史存储, 失败时不启用"""
+    if args.no_history:
+        return None
+    try:
+        return MetricStore(args.history_dir)
+    except OSError as e:
+        print(f"Error opening history store: {e}")
+        return None
+
+def open_alerts(args):
+    """创建告警引擎, 规则文件无效时不启用"""
+    try:
+        return AlertEngine(load_rules(args.alert_rules), args.alert_log)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Error loading alert rules: {e}")
+        return None
+
 def main():
     """主函数"""
-    app = PyDexUI()
+    STARTUP.mark("imports")
+    args = parse_args()
+    if args.headless:
+        close_splash()
+        serve(args.listen, open_store(args), open_alerts(args))
+        return
+    
+    alerts = open_alerts(args)
+    if args.connect:
+        collector = RemoteCollector(args.connect, alerts=alerts)
+        store = None
+    else:
+        collector = None
+        store = open_store(args)
+    STARTUP.mark("store")
+    app = PyDexUI(collector, store, alerts, startup_profile=args.startup_profile, job_workers=max(1, args.jobs))
     try:
         app.run()
     except KeyboardInterrupt:
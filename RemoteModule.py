@@ -0,0 +1,313 @@
+"""
+PyDEX-UI 远程采集模块
+无界面采集器通过TCP/Unix socket以换行分隔的JSON推送增量快照帧, 界面可连接到本地或远程采集器
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+
+from CollectorModule import PROBES, Snapshot, SystemCollector
+from HistoryModule import ProcessHistory
+from ProcessModule import ProcessIndex, ProcessSorter, ProcessTree, parse_filter
+
+DEFAULT_ADDRESS = "127.0.0.1:7878"
+
+
+def parse_address(address):
+    """解析地址, 返回 (地址族, 地址); "unix:/path" 表示Unix socket"""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def encode_probe(result):
+    """将单个采集项的结果编码为紧凑JSON"""
+    return json.dumps(result, separators=(",", ":")).encode()
+
+
+def encode_frame(snapshot, payloads):
+    """将快照编码为一行增量帧: 序号、时间和版本, 以及payloads中 {采集项: 已编码结果} 的采集项"""
+    head = json.dumps({
+        "seq": snapshot.seq,
+        "timestamp": snapshot.timestamp,
+        "versions": snapshot.versions,
+        "times": snapshot.times,
+    }, separators=(",", ":")).encode()
+    probes = b",".join(b'"%s":%s' % (name.encode(), payload) for name, payload in payloads.items())
+    return head[:-1] + b',"probes":{' + probes + b"}}\n"
+
+
+def decode_frame(line, previous=None):
+    """将一行增量帧合并到上一个快照, 返回新的快照"""
+    data = json.loads(line)
+    probes = data.pop("probes")
+    if probes.get("processes") is not None:
+        probes["processes"] = tuple(probes["processes"])
+
+    fields = previous._asdict() if previous is not None else dict.fromkeys(PROBES)
+    fields.update(data)
+    fields.update(probes)
+    return Snapshot(**fields)
+
+
+class _StreamHandler(socketserver.BaseRequestHandler):
+    """向单个客户端持续推送快照: 每帧只包含该客户端上次发送后版本有变化的采集项"""
+
+    def handle(self):
+        server = self.server
+        last_seq = None
+        sent = {}
+        while not server.stopping:
+            snapshot = server.collector.latest
+            if snapshot is not None and snapshot.seq != last_seq:
+                last_seq = snapshot.seq
+                changed = [
+                    name for name, version in snapshot.versions.items()
+                    if sent.get(name) != version and getattr(snapshot, name) is not None
+                ]
+                payloads = {name: server.encoded_probe(snapshot, name) for name in changed}
+                try:
+                    self.request.sendall(encode_frame(snapshot, payloads))
+                except OSError:
+                    return
+                for name in changed:
+                    sent[name] = snapshot.versions[name]
+            time.sleep(server.poll_interval)
+
+
+class _ServerMixin:
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def setup_stream(self, collector):
+        self.collector = collector
+        self.stopping = False
+        self.poll_interval = 0.05
+
+        # 每个采集项的每个版本只编码一次, 所有客户端共享: 采集项 -> (版本, 编码结果)
+        self._encoded = {}
+        self._encode_lock = threading.Lock()
+
+    def encoded_probe(self, snapshot, name):
+        """返回快照中采集项name的编码结果"""
+        version = snapshot.versions[name]
+        with self._encode_lock:
+            cached = self._encoded.get(name)
+            if cached is None or cached[0] != version:
+                cached = (version, encode_probe(getattr(snapshot, name)))
+                self._encoded[name] = cached
+            return cached[1]
+
+
+class _TCPStreamServer(_ServerMixin, socketserver.ThreadingTCPServer):
+    pass
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixStreamServer(_ServerMixin, socketserver.ThreadingUnixStreamServer):
+        pass
+
+
+def create_server(collector, address=DEFAULT_ADDRESS):
+    """创建快照推送服务"""
+    family, addr = parse_address(address)
+    if family == socket.AF_UNIX:
+        # 只删除上次遗留的socket文件, 不覆盖其他文件
+        try:
+            mode = os.lstat(addr).st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None:
+            if not stat.S_ISSOCK(mode):
+                raise OSError(f"Refusing to replace non-socket file: {addr}")
+            os.unlink(addr)
+        server = _UnixStreamServer(addr, _StreamHandler)
+    else:
+        server = _TCPStreamServer(addr, _StreamHandler)
+    server.setup_stream(collector)
+    return server
+
+
+def serve(address=DEFAULT_ADDRESS, store=None, alerts=None):
+    """无界面模式: 采集并推送快照直到被中断"""
+    collector = SystemCollector(process_limit=None, store=store, alerts=alerts)
+    try:
+        server = create_server(collector, address)
+    except OSError as e:
+        print(f"Error starting collector stream on {address}: {e}")
+        return
+    collector.start()
+    print(f"PyDEX-UI collector streaming on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down PyDEX-UI collector...")
+    finally:
+        server.stopping = True
+        server.server_close()
+        collector.stop()
+
+
+class RemoteCollector:
+    """连接到远程采集器, 提供与SystemCollector相同的读取接口"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, process_limit=50, retry_interval=2.0, alerts=None):
+        self.address = address
+        self.process_limit = process_limit
+        self.process_sorter = ProcessSorter()
+        self.tree_mode = False
+        self.process_tree = ProcessTree()
+        self.tree_toggled = frozenset()
+        self.process_index = ProcessIndex()
+        self.process_filter = None
+        self.process_history = ProcessHistory()
+        self.retry_interval = retry_interval
+
+        # 告警在本地按收到的快照求值
+        self.alerts = alerts
+        self._observed = {}
+
+        # 采样节奏由远程采集器决定, 这里只为接口兼容
+        self.throttle = 1.0
+
+        self._latest = None
+        self._retired = None
+        self._received = None
+        self._resorts = 0
+        self._indexed = None
+        self._tree_built = None
+        self._publish_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._sock = None
+
+    @property
+    def latest(self):
+        """最近收到的快照, 尚未连接时为None"""
+        return self._latest
+
+    def start(self):
+        """启动接收线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="pydex-remote")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """停止接收线程"""
+        self._stop_event.set()
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request_refresh(self, *probes):
+        """排序和数量限制在本地应用, 用最近收到的进程列表立即重新选择"""
+        if self._received is not None:
+            self._resorts += 1
+            self._publish(self._received)
+
+    def request_reselect(self):
+        """用最近收到的进程列表立即重新选择"""
+        self.request_refresh("processes")
+
+    def toggle_tree_node(self, pid):
+        """折叠或展开进程树中的节点, 用最近收到的进程列表立即重新选择"""
+        self.tree_toggled = self.tree_toggled ^ {pid}
+        self.request_reselect()
+
+    def set_filter(self, text):
+        """设置进程过滤表达式, 用最近收到的进程列表立即重新选择"""
+        self.process_filter = parse_filter(text)
+        self.request_reselect()
+
+    def set_visible(self, probes):
+        """可见性由各查看端自行处理, 不影响远程采样"""
+
+    def _publish(self, snapshot):
+        """在本地过滤、排序并截取进程列表 (或构建进程树) 后发布"""
+        with self._publish_lock:
+            # 同一版本的进程列表只建立一次索引和进程树, 只记录一次历史
+            version = snapshot.versions["processes"]
+            if version != self._indexed:
+                self._indexed = version
+                self.process_index.update(snapshot.processes or ())
+
+                # 远程快照不含I/O计数, 逐进程历史只有CPU、内存和线程数
+                history = self.process_history
+                history.record(snapshot.times["processes"], history.tracked(snapshot.processes or ()))
+            if self.tree_mode and version != self._tree_built:
+                self._tree_built = version
+                self.process_tree.update(snapshot.processes or ())
+                if self.tree_toggled - self.process_tree.procs.keys():
+                    self.tree_toggled = self.tree_toggled & self.process_tree.procs.keys()
+
+            matches = self.process_index.match(self.process_filter)
+            if self.tree_mode:
+                include = None if matches is None else self.process_tree.with_ancestors(matches)
+                processes = self.process_tree.rows(*self.process_sorter.order, include=include,
+                                                   toggled=self.tree_toggled)
+            else:
+                procs = self.process_index.procs
+                candidates = procs.values() if matches is None else [procs[pid] for pid in matches]
+                processes = self.process_sorter.select(candidates, self.process_limit)
+
+            versions = dict(snapshot.versions)
+            versions["processes"] += self._resorts
+            self._retired = self._latest
+            self._latest = snapshot._replace(processes=tuple(processes), versions=versions)
+
+    def _observe(self, snapshot):
+        """将快照中有更新的采集项输入告警引擎"""
+        for name, version in snapshot.versions.items():
+            result = getattr(snapshot, name)
+            if self._observed.get(name) == version or result is None:
+                continue
+            self._observed[name] = version
+            if name == "processes":
+                self.alerts.observe_processes(snapshot.times[name], result)
+            else:
+                self.alerts.observe(name, snapshot.times[name], result)
+
+    def _run(self):
+        """接收循环, 断开后自动重连"""
+        while not self._stop_event.is_set():
+            try:
+                self._receive()
+            except (OSError, ValueError) as e:
+                print(f"Error receiving from collector {self.address}: {e}")
+            self._stop_event.wait(self.retry_interval)
+
+    def _receive(self):
+        """连接并逐行读取快照"""
+        family, addr = parse_address(self.address)
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.connect(addr)
+            self._sock = sock
+            with sock.makefile("rb") as stream:
+                # 每个连接的第一帧包含全部采集项, 之后只合并有更新的采集项;
+                # 重连后远程版本号可能重新开始, 索引和进程树需要重建
+                snapshot = None
+                with self._publish_lock:
+                    self._indexed = None
+                    self._tree_built = None
+                for line in stream:
+                    if self._stop_event.is_set():
+                        return
+                    snapshot = decode_frame(line, snapshot)
+                    self._received = snapshot
+                    if self.alerts:
+                        self._observe(snapshot)
+                    self._publish(snapshot)
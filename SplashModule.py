@@ -1,5 +1,21 @@
 from contextlib import suppress
 
-with suppress(ModuleNotFoundError):
+# PyInstaller的启动画面模块只在打包运行时存在
+try:
     import pyi_splash
-    pyi_splash.close()
\ No newline at end of file
+except ModuleNotFoundError:
+    pyi_splash = None
+
+
+def update_splash(text):
+    """更新启动画面上的文字"""
+    if pyi_splash:
+        with suppress(RuntimeError):
+            pyi_splash.update_text(text)
+
+
+def close_splash():
+    """关闭启动画面 (可重复调用)"""
+    if pyi_splash:
+        with suppress(RuntimeError):
+            pyi_splash.close()
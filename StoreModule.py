@@ -0,0 +1,281 @@
+"""
+PyDEX-UI 持久化历史模块
+按时间分段的只追加定长记录文件, 读取时通过mmap按需访问, 过期分段自动删除
+"""
+
+import bisect
+import math
+import mmap
+import os
+import struct
+import time
+from array import array
+
+# 分段文件头: 魔数, 版本, 字段数, 分段起始时间
+HEADER = struct.Struct("<4sHHd")
+MAGIC = b"PYDX"
+VERSION = 1
+
+SEGMENT_SECONDS = 3600
+RETENTION_SECONDS = 7 * 86400
+FLUSH_INTERVAL = 1.0
+
+# 持久化的采集项及字段 (每条记录为时间戳加这些字段, 均为double)
+STORE_SERIES = {
+    "cpu": ("percent",),
+    "memory": ("percent", "used"),
+    "disk": ("percent", "read_speed", "write_speed"),
+    "network": ("upload_speed", "download_speed"),
+    "connections": ("total",),
+}
+
+
+def _min_max(chunk):
+    """返回chunk中非NaN值的 (最小值, 最大值), 全为NaN时为 (nan, nan)"""
+    lo = min(chunk)
+    hi = max(chunk)
+    if math.isnan(lo) or math.isnan(hi):
+        # min/max遇到开头的NaN会直接返回NaN, 只在这种少见情况下逐个过滤
+        values = [value for value in chunk if not math.isnan(value)]
+        if not values:
+            return math.nan, math.nan
+        lo = min(values)
+        hi = max(values)
+    return lo, hi
+
+
+def _merge(a, b, pick):
+    """合并两个桶的极值, 忽略NaN"""
+    if math.isnan(a):
+        return b
+    if math.isnan(b):
+        return a
+    return pick(a, b)
+
+
+def default_store_dir():
+    """默认的历史数据目录"""
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "pydex-ui", "history")
+
+
+class SeriesStore:
+    """单个采集项的分段存储"""
+
+    def __init__(self, root, name, fields):
+        self.name = name
+        self.fields = tuple(fields)
+        self.width = len(self.fields) + 1
+        self.record = struct.Struct(f"<{self.width}d")
+        self.directory = os.path.join(root, name)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._file = None
+        self._segment_start = None
+
+    def segments(self):
+        """返回按时间排序的 [(分段起始时间, 路径)]"""
+        result = []
+        for filename in os.listdir(self.directory):
+            stem, ext = os.path.splitext(filename)
+            if ext == ".seg" and stem.isdigit():
+                result.append((int(stem), os.path.join(self.directory, filename)))
+        result.sort()
+        return result
+
+    def append(self, timestamp, values):
+        """追加一条记录, 跨越分段边界时切换文件"""
+        start = int(timestamp - timestamp % SEGMENT_SECONDS)
+        if start != self._segment_start:
+            self._open_segment(start)
+        self._file.write(self.record.pack(timestamp, *values))
+
+    def _open_segment(self, start):
+        """打开 (或创建) 指定起始时间的分段"""
+        self.close()
+        path = os.path.join(self.directory, f"{start}.seg")
+
+        # 已有文件格式不符时放到一边, 避免读出错位的记录
+        if os.path.exists(path) and not self._valid_header(path):
+            os.replace(path, path + ".bad")
+
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, len(self.fields), start))
+        else:
+            # 上次写入中断时截掉不完整的尾部记录
+            excess = (self._file.tell() - HEADER.size) % self.record.size
+            if excess:
+                self._file.truncate(self._file.tell() - excess)
+        self._segment_start = start
+
+    def _valid_header(self, path):
+        with open(path, "rb") as f:
+            data = f.read(HEADER.size)
+        if len(data) < HEADER.size:
+            return False
+        magic, version, nfields, _ = HEADER.unpack(data)
+        return magic == MAGIC and version == VERSION and nfields == len(self.fields)
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            self._segment_start = None
+
+    def enforce_retention(self, now, retention=RETENTION_SECONDS):
+        """删除整段都早于保留期限的分段"""
+        for start, path in self.segments():
+            if start + SEGMENT_SECONDS < now - retention and start != self._segment_start:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _map_segments(self, start, end):
+        """依次产出与[start, end]重叠的分段mmap和记录数"""
+        for seg_start, path in self.segments():
+            if seg_start + SEGMENT_SECONDS < start or seg_start > end:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    count = (size - HEADER.size) // self.record.size
+                    if count <= 0:
+                        continue
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                continue
+            try:
+                yield mapped, count
+            finally:
+                try:
+                    mapped.close()
+                except BufferError:
+                    # 仍有视图引用时交给垃圾回收
+                    pass
+
+    def _columns(self, mapped, count):
+        """返回 (时间戳视图, [字段视图]), 均为对mmap的零拷贝跨步视图"""
+        flat = memoryview(mapped)[HEADER.size:HEADER.size + count * self.record.size].cast("d")
+        width = self.width
+        return flat[0::width], [flat[i::width] for i in range(1, width)]
+
+    def read_columns(self, start, end, fields):
+        """读取[start, end]范围内的时间戳和指定字段, 返回 (xs, [ys...]) 的array
+
+        从mmap的跨步视图按切片整体拷贝, 不逐条构造记录; 跳过任一字段为NaN的记录。
+        """
+        indexes = [self.fields.index(field) for field in fields]
+        xs = array("d")
+        ys = [array("d") for _ in indexes]
+        for mapped, count in self._map_segments(start, end):
+            times, columns = self._columns(mapped, count)
+            lo = bisect.bisect_left(times, start)
+            hi = bisect.bisect_right(times, end)
+            xs.frombytes(times[lo:hi].tobytes())
+            for out, index in zip(ys, indexes):
+                out.frombytes(columns[index][lo:hi].tobytes())
+            del times, columns
+
+        # 未采到的值 (如重启后的第一个速率) 记为NaN, 很少出现, 有时才逐条过滤
+        if any(any(map(math.isnan, column)) for column in ys):
+            keep = [i for i in range(len(xs)) if not any(math.isnan(column[i]) for column in ys)]
+            xs = array("d", (xs[i] for i in keep))
+            ys = [array("d", (column[i] for i in keep)) for column in ys]
+        return xs, ys
+
+    def query(self, start, end, buckets):
+        """按时间桶做min/max降采样, 返回 (xs, [ys...]) 的array
+
+        每个非空桶输出两个点, 只读取与范围重叠的分段, 不把整个文件载入内存;
+        跨越分段边界的桶合并为一个。NaN (未采到的值) 不参与极值, 桶内全为NaN时输出NaN。
+        """
+        buckets = max(1, int(buckets))
+        step = (end - start) / buckets
+        xs = array("d")
+        ys = [array("d") for _ in self.fields]
+        last_bucket = None
+
+        for mapped, count in self._map_segments(start, end):
+            times, columns = self._columns(mapped, count)
+            lo = bisect.bisect_left(times, start)
+            hi = bisect.bisect_right(times, end)
+            i = lo
+            while i < hi:
+                # 当前桶及其结束位置, 恰好等于end的样本归入最后一个桶
+                bucket = min(int((times[i] - start) // step), buckets - 1)
+                if bucket == buckets - 1:
+                    j = hi
+                else:
+                    j = max(i + 1, bisect.bisect_left(times, start + (bucket + 1) * step, i, hi))
+
+                if bucket == last_bucket:
+                    xs[-1] = times[j - 1]
+                    for out, column in zip(ys, columns):
+                        chunk = column[i:j]
+                        low, high = _min_max(chunk)
+                        out[-2] = _merge(out[-2], low, min)
+                        out[-1] = _merge(out[-1], high, max)
+                        del chunk
+                else:
+                    xs.append(times[i])
+                    xs.append(times[j - 1])
+                    for out, column in zip(ys, columns):
+                        chunk = column[i:j]
+                        low, high = _min_max(chunk)
+                        out.append(low)
+                        out.append(high)
+                        del chunk
+                last_bucket = bucket
+                i = j
+            del times, columns
+
+        return xs, ys
+
+
+class MetricStore:
+    """所有采集项的持久化存储"""
+
+    def __init__(self, root=None, retention=RETENTION_SECONDS):
+        self.root = root or default_store_dir()
+        self.retention = retention
+        self.series = {name: SeriesStore(self.root, name, fields) for name, fields in STORE_SERIES.items()}
+        self._last_flush = time.monotonic()
+        self._last_retention = 0.0
+
+    def append(self, probe, timestamp, result):
+        """记录一次采样结果 (仅采集线程调用)"""
+        store = self.series.get(probe)
+        if store is None or not result:
+            return
+        values = [result.get(field) for field in store.fields]
+        store.append(timestamp, [math.nan if value is None else value for value in values])
+
+    def maintain(self):
+        """定期刷盘并执行保留策略; 磁盘写满等错误只打印, 不中断采集线程"""
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self._last_flush = now
+            for store in self.series.values():
+                try:
+                    store.flush()
+                except OSError as e:
+                    print(f"Error flushing history: {e}")
+
+        wall = time.time()
+        if wall - self._last_retention >= SEGMENT_SECONDS:
+            self._last_retention = wall
+            for store in self.series.values():
+                try:
+                    store.enforce_retention(wall, self.retention)
+                except OSError as e:
+                    print(f"Error enforcing history retention: {e}")
+
+    def close(self):
+        for store in self.series.values():
+            store.close()
@@ -0,0 +1,416 @@
+"""
+PyDEX-UI 终端模块
+有界的按行回滚缓冲区, 以及基于伪终端和selector的持久shell会话
+"""
+
+import codecs
+import os
+import queue
+import re
+import selectors
+import signal
+import threading
+import time
+from collections import deque
+from contextlib import suppress
+
+# 伪终端仅在POSIX平台可用
+try:
+    import pty
+except ImportError:
+    pty = None
+
+
+class TerminalBuffer:
+    """终端回滚缓冲区
+
+    未结束的当前行也计入行数和字节数上限; 超过max_line_chars的行折成多行,
+    没有换行的输出 (进度条、二进制内容) 同样有界。单独的回车回到行首, 一行中
+    只保留最后一个回车之后的文本, 进度条的每次刷新覆盖上一次而不是追加。
+    """
+
+    def __init__(self, max_lines=10000, max_bytes=4 * 1024 * 1024, view_lines=200, max_line_chars=4096):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.view_lines = view_lines
+        self.max_line_chars = max_line_chars
+
+        self._queue = queue.SimpleQueue()
+        self._lines = deque()
+        self._partial = ""
+        self._bytes = 0
+
+        # 距离末尾向上滚动的行数, 0表示跟随最新输出
+        self.scroll_offset = 0
+
+    def write(self, text):
+        """写入输出 (任意线程可调用)"""
+        if text:
+            self._queue.put(text)
+
+    def drain(self):
+        """取出队列中的全部输出并合并到缓冲区 (仅渲染线程调用), 返回是否有变化"""
+        chunks = []
+        try:
+            while True:
+                chunks.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not chunks:
+            return False
+
+        # 当前行不超过max_line_chars, 每次合并的代价与新输出成正比
+        text = self._partial + "".join(chunks)
+        parts = text.split("\n")
+        partial = parts.pop()
+        if "\r" in text:
+            partial = _carriage_return(partial)
+            parts = [_carriage_return(line.rstrip("\r")) for line in parts]
+        for line in parts:
+            self._append(line)
+
+        # 过长的当前行按max_line_chars折行, 只保留不足一行的剩余部分
+        width = self.max_line_chars
+        if len(partial) > width:
+            cut = len(partial) - len(partial) % width
+            self._append(partial[:cut])
+            partial = partial[cut:]
+        self._partial = partial
+
+        self._trim()
+        return True
+
+    def _append(self, line):
+        """追加一个完整的行, 超过max_line_chars时折成多行"""
+        width = self.max_line_chars
+        if len(line) <= width:
+            self._lines.append(line)
+            self._bytes += len(line) + 1
+            return
+        for start in range(0, len(line), width):
+            self._lines.append(line[start:start + width])
+            self._bytes += min(width, len(line) - start) + 1
+
+    def _trim(self):
+        """按行数和字节数上限 (包括当前行) 丢弃最旧的行"""
+        lines = self._lines
+        partial = len(self._partial)
+        max_lines = self.max_lines - (1 if partial else 0)
+        max_bytes = self.max_bytes - partial
+        while lines and (len(lines) > max_lines or self._bytes > max_bytes):
+            self._bytes -= len(lines.popleft()) + 1
+        if partial > self.max_bytes:
+            self._partial = self._partial[-self.max_bytes:]
+
+    def __len__(self):
+        return len(self._lines) + (1 if self._partial else 0)
+
+    def scroll(self, delta):
+        """滚动视图, 正数向上"""
+        limit = max(0, len(self) - self.view_lines)
+        self.scroll_offset = min(max(0, self.scroll_offset + delta), limit)
+
+    def text(self):
+        """返回当前可见窗口的文本"""
+        lines = self._lines
+        count = self.view_lines
+        end = len(lines) - self.scroll_offset
+
+        # 跟随末尾时未结束的当前行也占一行
+        tail = self._partial if self.scroll_offset == 0 and self._partial else None
+        if tail is not None:
+            tail = tail.rstrip("\r")
+            count -= 1
+
+        window = [lines[i] for i in range(max(0, end - count), end)]
+        if tail is not None:
+            window.append(tail)
+        return "\n".join(window)
+
+    def clear(self):
+        """清空缓冲区"""
+        self._lines.clear()
+        self._partial = ""
+        self._bytes = 0
+        self.scroll_offset = 0
+
+
+def _carriage_return(line):
+    """只保留行中最后一个回车之后的文本; 行尾的回车保留, 以便与随后的换行合并为CRLF"""
+    end = len(line.rstrip("\r"))
+    start = line.rfind("\r", 0, end) + 1
+    return line[start:] if start else line
+
+
+# CSI/OSC等ANSI转义序列, 以及退格和响铃等控制字符
+_ANSI_RE = re.compile(
+    r"\x1b\[[0-?]*[ -/]*[@-~]"          # CSI
+    r"|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)"  # OSC
+    r"|\x1b[@-Z\\-_]"                  # 其他两字节序列
+    r"|[\x07\x08\x0e\x0f]"
+)
+
+# 转义序列在chunk末尾被截断时最多保留的字符数
+_MAX_PENDING_ESCAPE = 64
+
+READ_CHUNK = 64 * 1024
+
+# 结束会话时等待shell退出的时间, 超时后强制结束
+CLOSE_TIMEOUT = 1.0
+
+
+class AnsiStripper:
+    """流式去除ANSI转义序列, 处理跨chunk被截断的序列; 回车由TerminalBuffer处理"""
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, text):
+        """输入一段文本, 返回去除转义序列后的文本"""
+        text = self._pending + text
+        self._pending = ""
+
+        # 末尾未结束的转义序列留到下次处理
+        esc = text.rfind("\x1b")
+        if esc != -1 and len(text) - esc < _MAX_PENDING_ESCAPE and not _ANSI_RE.match(text, esc):
+            self._pending = text[esc:]
+            text = text[:esc]
+
+        return _ANSI_RE.sub("", text)
+
+
+class ShellSession:
+    """运行在伪终端上的持久shell会话"""
+
+    def __init__(self, buffer, shell=None):
+        self.buffer = buffer
+        self.shell = shell or os.environ.get("SHELL", "/bin/sh")
+        self.exit_code = None
+
+        env = dict(os.environ, TERM="dumb", PAGER="cat")
+        self.pid, self.fd = pty.fork()
+        if self.pid == 0:
+            try:
+                os.execvpe(self.shell, [self.shell], env)
+            finally:
+                os._exit(127)
+
+        os.set_blocking(self.fd, False)
+
+        # shell初始化终端时会丢弃已输入的内容, 首次输出前的输入先暂存
+        self._ready = False
+        self._early_input = []
+        self._input_lock = threading.Lock()
+
+        # 主端不可写时尚未写入的输入, 由I/O线程在可写时继续写入
+        self._outgoing = bytearray()
+        self.io_loop = None
+
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._stripper = AnsiStripper()
+
+    @property
+    def alive(self):
+        return self.exit_code is None
+
+    def fileno(self):
+        return self.fd
+
+    def send(self, text):
+        """向shell写入输入"""
+        if not self.alive:
+            return
+        with self._input_lock:
+            if not self._ready:
+                self._early_input.append(text)
+                return
+            self._outgoing += text.encode()
+            done = self._flush()
+        if not done and self.io_loop:
+            self.io_loop.request_write()
+
+    @property
+    def wants_write(self):
+        """是否有尚未写入的输入"""
+        return bool(self._outgoing)
+
+    def _flush(self):
+        """不阻塞地写入待发送的输入, 返回是否已全部写入 (调用方持有_input_lock)"""
+        outgoing = self._outgoing
+        while outgoing:
+            try:
+                written = os.write(self.fd, outgoing)
+            except BlockingIOError:
+                return False
+            except OSError:
+                # shell已退出, 丢弃剩余输入
+                outgoing.clear()
+                break
+            del outgoing[:written]
+        return True
+
+    def on_writable(self):
+        """主端可写时继续写入待发送的输入 (I/O线程调用)"""
+        with self._input_lock:
+            self._flush()
+
+    def interrupt(self):
+        """发送Ctrl-C"""
+        self.send("\x03")
+
+    def suspend(self):
+        """发送Ctrl-Z"""
+        self.send("\x1a")
+
+    def send_eof(self):
+        """发送Ctrl-D"""
+        self.send("\x04")
+
+    def signal(self, sig):
+        """向前台进程组发送信号"""
+        if self.alive:
+            with suppress(OSError):
+                os.killpg(os.tcgetpgrp(self.fd), sig)
+
+    def on_readable(self):
+        """读取一大块输出写入缓冲区, 返回False表示会话已结束"""
+        try:
+            data = os.read(self.fd, READ_CHUNK)
+        except BlockingIOError:
+            return True
+        except OSError:
+            # Linux上从端关闭后读取主端返回EIO
+            data = b""
+
+        if not data:
+            self._reap()
+            return False
+
+        self.buffer.write(self._stripper.feed(self._decoder.decode(data)))
+
+        if not self._ready:
+            with self._input_lock:
+                self._ready = True
+                for text in self._early_input:
+                    self._outgoing += text.encode()
+                self._early_input.clear()
+                self._flush()
+        return True
+
+    def _reap(self, timeout=CLOSE_TIMEOUT):
+        """回收子进程并记录退出码; timeout秒内未退出时强制结束"""
+        if self.exit_code is not None:
+            return
+        with suppress(OSError):
+            os.close(self.fd)
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+                if pid:
+                    break
+                if time.monotonic() >= deadline:
+                    with suppress(OSError):
+                        os.kill(self.pid, signal.SIGKILL)
+                    _, status = os.waitpid(self.pid, 0)
+                    break
+                time.sleep(0.02)
+            self.exit_code = os.waitstatus_to_exitcode(status)
+        except ChildProcessError:
+            self.exit_code = -1
+        self.buffer.write(f"\n[Shell exited with code {self.exit_code}]\n")
+
+    def close(self):
+        """结束会话: 发送SIGHUP, CLOSE_TIMEOUT秒内未退出时发送SIGKILL"""
+        if self.alive:
+            with suppress(OSError):
+                os.kill(self.pid, signal.SIGHUP)
+            self._reap()
+
+
+class ShellIOLoop:
+    """单线程selector循环, 多路复用所有shell会话的输出"""
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.sessions = []
+
+        # 自管道: 其他线程通过它唤醒select以注册新会话或退出
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ)
+
+        self._pending = queue.SimpleQueue()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        """启动I/O线程"""
+        self._thread = threading.Thread(target=self._run, name="pydex-shell-io")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add(self, session):
+        """注册会话 (任意线程可调用)"""
+        session.io_loop = self
+        self.sessions.append(session)
+        self._pending.put(session)
+        self._wake()
+
+    def request_write(self):
+        """有会话的输入未能立即写入 (任意线程可调用), 唤醒I/O线程等待其可写"""
+        self._wake()
+
+    def stop(self, timeout=2.0):
+        """停止I/O线程并结束所有会话"""
+        self._stopping = True
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        for session in self.sessions:
+            session.close()
+        self.selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def _wake(self):
+        with suppress(BlockingIOError):
+            os.write(self._wake_w, b"\0")
+
+    def _run(self):
+        """I/O循环"""
+        while not self._stopping:
+            for key, events in self.selector.select():
+                if key.fileobj == self._wake_r:
+                    with suppress(BlockingIOError):
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    self._register_pending()
+                    continue
+                session = key.data
+                if events & selectors.EVENT_WRITE:
+                    session.on_writable()
+                if events & selectors.EVENT_READ and not session.on_readable():
+                    self.selector.unregister(key.fileobj)
+            self._update_interest()
+
+    def _update_interest(self):
+        """有待写入输入的会话同时等待可写, 其余只等待可读"""
+        for key in list(self.selector.get_map().values()):
+            if key.fileobj == self._wake_r:
+                continue
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if key.data.wants_write else 0)
+            if events != key.events:
+                self.selector.modify(key.fileobj, events, key.data)
+
+    def _register_pending(self):
+        """注册新加入的会话"""
+        try:
+            while True:
+                session = self._pending.get_nowait()
+                if session.alive:
+                    self.selector.register(session.fd, selectors.EVENT_READ, session)
+        except queue.Empty:
+            pass
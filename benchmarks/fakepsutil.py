@@ -0,0 +1,292 @@
+"""
+确定性的psutil替身, 用于基准测试
+模拟任意数量的进程、socket、磁盘和网卡, 每次tick()推进一步
+"""
+
+import os
+import random
+from collections import namedtuple
+from contextlib import contextmanager
+
+STATUS_RUNNING = "running"
+STATUS_SLEEPING = "sleeping"
+STATUS_DISK_SLEEP = "disk-sleep"
+STATUS_STOPPED = "stopped"
+STATUS_TRACING_STOP = "tracing-stop"
+STATUS_ZOMBIE = "zombie"
+STATUS_DEAD = "dead"
+
+CONN_ESTABLISHED = "ESTABLISHED"
+CONN_SYN_SENT = "SYN_SENT"
+CONN_SYN_RECV = "SYN_RECV"
+CONN_FIN_WAIT1 = "FIN_WAIT1"
+CONN_FIN_WAIT2 = "FIN_WAIT2"
+CONN_TIME_WAIT = "TIME_WAIT"
+CONN_CLOSE = "CLOSE"
+CONN_CLOSE_WAIT = "CLOSE_WAIT"
+CONN_LAST_ACK = "LAST_ACK"
+CONN_LISTEN = "LISTEN"
+CONN_CLOSING = "CLOSING"
+CONN_NONE = "NONE"
+
+
+class Error(Exception):
+    pass
+
+
+class NoSuchProcess(Error):
+    def __init__(self, pid=None, name=None, msg=None):
+        super().__init__(msg or f"process no longer exists (pid={pid})")
+        self.pid = pid
+
+
+class ZombieProcess(NoSuchProcess):
+    pass
+
+
+class AccessDenied(Error):
+    pass
+
+
+svmem = namedtuple("svmem", ["total", "available", "percent", "used", "free"])
+sdiskusage = namedtuple("sdiskusage", ["total", "used", "free", "percent"])
+sdiskio = namedtuple("sdiskio", ["read_count", "write_count", "read_bytes", "write_bytes", "read_time", "write_time"])
+snetio = namedtuple("snetio", ["bytes_sent", "bytes_recv", "packets_sent", "packets_recv",
+                               "errin", "errout", "dropin", "dropout"])
+scpufreq = namedtuple("scpufreq", ["current", "min", "max"])
+sconn = namedtuple("sconn", ["fd", "family", "type", "laddr", "raddr", "status", "pid"])
+sdiskpart = namedtuple("sdiskpart", ["device", "mountpoint", "fstype", "opts"])
+pmem = namedtuple("pmem", ["rss", "vms"])
+pio = namedtuple("pio", ["read_count", "write_count", "read_bytes", "write_bytes"])
+
+_SOCKET_STATES = (CONN_ESTABLISHED, CONN_ESTABLISHED, CONN_ESTABLISHED, CONN_TIME_WAIT, CONN_LISTEN, CONN_CLOSE_WAIT)
+_USERS = ("root", "www-data", "postgres", "build", "nobody")
+_NAMES = ("python3", "cc1plus", "postgres", "nginx", "node", "java", "bash", "sshd", "systemd", "rustc")
+_STATUSES = (STATUS_SLEEPING, STATUS_SLEEPING, STATUS_SLEEPING, STATUS_RUNNING, STATUS_DISK_SLEEP)
+
+TOTAL_MEMORY = 256 * 1024 ** 3
+BOOT_TIME = 1_700_000_000.0
+
+
+class _Proc:
+    __slots__ = ("pid", "ppid", "name", "username", "status", "create_time",
+                 "cpu", "rss", "threads", "io_read", "io_write")
+
+
+class Machine:
+    """模拟主机的全部状态"""
+
+    def __init__(self, processes=1000, sockets=1000, disks=4, nics=2, cpus=8, churn=0.01, seed=0):
+        self.rng = random.Random(seed)
+        self.cpus = cpus
+        self.churn = churn
+        self.now = BOOT_TIME + 86400.0
+        self.next_pid = 1
+        self.procs = {}
+        for _ in range(processes):
+            self._spawn()
+
+        rng = self.rng
+        self.sockets = [rng.choice(_SOCKET_STATES) for _ in range(sockets)]
+        self.disks = {f"nvme{i}n1": [0, 0, 0, 0] for i in range(disks)}
+        self.nics = {f"eth{i}": [0, 0, 0, 0] for i in range(nics)}
+        self.cpu_percents = [0.0] * cpus
+
+    def _spawn(self):
+        rng = self.rng
+        proc = _Proc()
+        proc.pid = self.next_pid
+        self.next_pid += 1
+        proc.ppid = rng.choice(list(self.procs)) if self.procs else 0
+        proc.name = f"{rng.choice(_NAMES)}-{proc.pid % 97}"
+        proc.username = rng.choice(_USERS)
+        proc.status = rng.choice(_STATUSES)
+        proc.create_time = self.now - rng.uniform(0, 86400)
+        proc.cpu = 0.0
+        proc.rss = rng.randint(1 << 20, 1 << 31)
+        proc.threads = rng.randint(1, 64)
+        proc.io_read = 0
+        proc.io_write = 0
+        self.procs[proc.pid] = proc
+
+    def tick(self, seconds=1.0):
+        """推进模拟时间: 更新计数器, 按churn比例结束和创建进程"""
+        rng = self.rng
+        self.now += seconds
+        for proc in self.procs.values():
+            proc.cpu = rng.random() * 5 if rng.random() < 0.2 else 0.0
+            if rng.random() < 0.1:
+                proc.rss = max(1 << 20, proc.rss + rng.randint(-1 << 22, 1 << 22))
+            proc.io_read += rng.randint(0, 1 << 16)
+            proc.io_write += rng.randint(0, 1 << 16)
+
+        changes = int(len(self.procs) * self.churn)
+        if changes:
+            for pid in rng.sample(list(self.procs), changes):
+                del self.procs[pid]
+            for _ in range(changes):
+                self._spawn()
+
+        for counters in self.disks.values():
+            counters[0] += rng.randint(0, 1000)
+            counters[1] += rng.randint(0, 1000)
+            counters[2] += rng.randint(0, 1 << 26)
+            counters[3] += rng.randint(0, 1 << 26)
+        for counters in self.nics.values():
+            counters[0] += rng.randint(0, 1 << 24)
+            counters[1] += rng.randint(0, 1 << 24)
+            counters[2] += rng.randint(0, 10000)
+            counters[3] += rng.randint(0, 10000)
+        self.cpu_percents = [rng.random() * 100 for _ in range(self.cpus)]
+
+
+MACHINE = Machine(processes=10)
+
+
+def configure(**kwargs):
+    """重建模拟主机"""
+    global MACHINE
+    MACHINE = Machine(**kwargs)
+    return MACHINE
+
+
+def tick(seconds=1.0):
+    MACHINE.tick(seconds)
+
+
+# 系统级接口
+
+def cpu_percent(interval=None, percpu=False):
+    if percpu:
+        return list(MACHINE.cpu_percents)
+    return sum(MACHINE.cpu_percents) / len(MACHINE.cpu_percents)
+
+
+def cpu_count(logical=True):
+    return MACHINE.cpus if logical else max(1, MACHINE.cpus // 2)
+
+
+def cpu_freq(percpu=False):
+    freq = scpufreq(2400.0, 800.0, 3600.0)
+    return [freq] * MACHINE.cpus if percpu else freq
+
+
+def virtual_memory():
+    used = min(TOTAL_MEMORY, sum(p.rss for p in MACHINE.procs.values()) // 8)
+    return svmem(TOTAL_MEMORY, TOTAL_MEMORY - used, used / TOTAL_MEMORY * 100, used, TOTAL_MEMORY - used)
+
+
+def disk_usage(path):
+    total = 4 * 1024 ** 4
+    used = total // 3
+    return sdiskusage(total, used, total - used, used / total * 100)
+
+
+def disk_partitions(all=False):
+    return [sdiskpart(f"/dev/{name}", "/" if i == 0 else f"/mnt/{name}", "ext4", "rw")
+            for i, name in enumerate(MACHINE.disks)]
+
+
+def disk_io_counters(perdisk=False):
+    per = {name: sdiskio(c[0], c[1], c[2], c[3], 0, 0) for name, c in MACHINE.disks.items()}
+    if perdisk:
+        return per
+    return sdiskio(*(sum(values) for values in zip(*per.values())))
+
+
+def net_io_counters(pernic=False):
+    per = {name: snetio(c[0], c[1], c[2], c[3], 0, 0, 0, 0) for name, c in MACHINE.nics.items()}
+    if pernic:
+        return per
+    return snetio(*(sum(values) for values in zip(*per.values())))
+
+
+def net_connections(kind="inet"):
+    return [sconn(-1, 2, 1, ("10.0.0.1", 1000 + i), (), state, None)
+            for i, state in enumerate(MACHINE.sockets)]
+
+
+def boot_time():
+    return BOOT_TIME
+
+
+def pids():
+    return list(MACHINE.procs)
+
+
+def pid_exists(pid):
+    return pid in MACHINE.procs
+
+
+# 进程接口
+
+class Process:
+    def __init__(self, pid=None):
+        if pid is None:
+            pid = os.getpid()
+        self.pid = pid
+        self._self = pid == os.getpid() and pid not in MACHINE.procs
+        if not self._self and pid not in MACHINE.procs:
+            raise NoSuchProcess(pid)
+        self._create_time = None if self._self else MACHINE.procs[pid].create_time
+
+    def _proc(self):
+        proc = MACHINE.procs.get(self.pid)
+        if proc is None or proc.create_time != self._create_time:
+            raise NoSuchProcess(self.pid)
+        return proc
+
+    @contextmanager
+    def oneshot(self):
+        yield
+
+    def is_running(self):
+        return self._self or self.pid in MACHINE.procs
+
+    def name(self):
+        return self._proc().name
+
+    def username(self):
+        return self._proc().username
+
+    def create_time(self):
+        return self._proc().create_time
+
+    def ppid(self):
+        return self._proc().ppid
+
+    def status(self):
+        return self._proc().status
+
+    def cpu_percent(self, interval=None):
+        return self._proc().cpu
+
+    def memory_info(self):
+        if self._self:
+            return pmem(64 << 20, 256 << 20)
+        proc = self._proc()
+        return pmem(proc.rss, proc.rss * 2)
+
+    def memory_percent(self):
+        return self.memory_info().rss / TOTAL_MEMORY * 100
+
+    def num_threads(self):
+        return self._proc().threads
+
+    def io_counters(self):
+        proc = self._proc()
+        return pio(0, 0, proc.io_read, proc.io_write)
+
+    def children(self, recursive=False):
+        return [Process(p.pid) for p in MACHINE.procs.values() if p.ppid == self.pid]
+
+
+def process_iter(attrs=None):
+    for pid in list(MACHINE.procs):
+        try:
+            proc = Process(pid)
+        except NoSuchProcess:
+            continue
+        if attrs:
+            proc.info = {name: getattr(proc, name)() if name != "pid" else pid for name in attrs}
+        yield proc
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+PyDEX-UI 基准测试
+用确定性的psutil替身驱动采集器、界面更新、终端和日志路径, 输出机器可读的JSON结果
+
+用法: python benchmarks/run_benchmarks.py [--quick] [--output results.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+# 必须在导入任何PyDEX-UI模块之前替换psutil
+import fakepsutil
+sys.modules["psutil"] = fakepsutil
+
+import dearpygui.dearpygui as dpg
+
+from AlertModule import AlertEngine, Rule
+from CollectorModule import PROBES, SystemCollector
+from LogModule import LogSearch
+from NetstatModule import ConnectionStats
+from ProcessModule import ProcessCache
+
+# (名称, 进程数, socket数, 磁盘数, 网卡数, CPU数)
+SCENARIOS = (
+    ("small", 100, 100, 2, 1, 4),
+    ("medium", 1000, 2000, 8, 4, 32),
+    ("large", 5000, 10000, 32, 16, 128),
+    ("huge", 20000, 50000, 64, 32, 256),
+)
+
+# 终端路径每次写入的合成输出行数
+TERMINAL_FRAME_LINES = 1000
+TERMINAL_BULK_LINES = 200000
+
+# 日志路径使用的合成日志行数
+LOG_LINES = 200000
+
+# 告警路径的规则数, 均匀分布在下列 (采集项, 字段) 和统计类型上
+ALERT_RULES = 300
+ALERT_FIELDS = (("cpu", "percent"), ("memory", "percent"), ("disk", "write_speed"), ("network", "download_speed"))
+ALERT_STATS = ("mean", "ewma", "min", "max", "p95", "p99", "growth")
+
+
+def load_app_module():
+    """以无视口模式加载PyDEX-UI.py"""
+    for name in ("create_viewport", "setup_dearpygui", "show_viewport", "set_primary_window"):
+        setattr(dpg, name, lambda *args, **kwargs: None)
+    dpg.get_viewport_client_width = lambda: 1200
+    dpg.get_viewport_client_height = lambda: 800
+
+    spec = importlib.util.spec_from_file_location("pydex_ui", os.path.join(ROOT, "PyDEX-UI.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    # 终端使用逐条命令的后备路径, 不启动真实shell
+    module.pty = None
+    return module
+
+
+def measure(fn, setup, iterations):
+    """测量fn的耗时分布, 以及单次调用的内存分配"""
+    durations = []
+    for _ in range(iterations):
+        setup()
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    setup()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    durations.sort()
+    return {
+        "iterations": iterations,
+        "mean_ms": statistics.fmean(durations),
+        "p50_ms": durations[len(durations) // 2],
+        "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+        "max_ms": durations[-1],
+        "alloc_net_bytes": current - base,
+        "alloc_peak_bytes": peak - base,
+    }
+
+
+def alert_rules(count):
+    """生成用于基准测试的告警规则 (阈值足够高, 不会触发)"""
+    return [
+        Rule(f"rule{i}", *ALERT_FIELDS[i % len(ALERT_FIELDS)], stat=ALERT_STATS[i % len(ALERT_STATS)],
+             window=60, op=">", threshold=1e12)
+        for i in range(count)
+    ]
+
+
+def run_scenario(module, name, processes, sockets, disks, nics, cpus, iterations):
+    """运行一个场景下的全部路径"""
+    fakepsutil.configure(processes=processes, sockets=sockets, disks=disks, nics=nics, cpus=cpus)
+
+    collector = SystemCollector()
+    collector.process_cache = ProcessCache(use_procfs=False)
+    collector.connection_stats = ConnectionStats(use_procfs=False)
+    app = module.PyDexUI(collector)
+    collector.stop()
+    for tab in module.TAB_BUILDERS:
+        app.build_tab(tab)
+
+    results = {}
+    try:
+        # 采集路径
+        for probe in PROBES:
+            results[f"probe.{probe}"] = measure(
+                lambda: collector.collect((probe,)),
+                fakepsutil.tick,
+                iterations,
+            )
+
+        # 界面更新路径: 每次先采集新数据 (不计时), 再计时应用
+        def fresh_snapshot():
+            fakepsutil.tick()
+            collector.collect()
+
+        for probe, handler in app.snapshot_handlers:
+            results[f"update.{handler.__name__}"] = measure(
+                lambda: handler(getattr(collector.latest, probe), collector.latest.times[probe]),
+                fresh_snapshot,
+                iterations,
+            )
+        results["update_all_data"] = measure(app.update_all_data, fresh_snapshot, iterations)
+
+        # 告警路径: 对一次完整采样求值全部规则
+        engine = AlertEngine(alert_rules(ALERT_RULES))
+
+        def observe_snapshot():
+            snapshot = collector.latest
+            for probe, _ in ALERT_FIELDS:
+                engine.observe(probe, snapshot.timestamp, getattr(snapshot, probe))
+
+        results["alerts.observe"] = measure(observe_snapshot, fresh_snapshot, iterations)
+
+        # 终端路径
+        buffer = app.active_terminal["buffer"]
+        frame_text = "".join(f"synthetic output line {i} with some padding text\n"
+                             for i in range(TERMINAL_FRAME_LINES))
+        bulk_text = "".join(f"synthetic output line {i} with some padding text\n"
+                            for i in range(TERMINAL_BULK_LINES))
+        results["terminal.flush_frame"] = measure(
+            app.flush_terminal, lambda: buffer.write(frame_text), iterations)
+        results["terminal.flush_bulk"] = measure(
+            app.flush_terminal, lambda: buffer.write(bulk_text), max(1, iterations // 10))
+
+        # 日志路径: 渲染可见行, 以及一帧的搜索时间片
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as f:
+            f.writelines(f"2026-01-01 00:00:00 host app[{i}]: synthetic log line {i} status={i % 97}\n"
+                         for i in range(LOG_LINES))
+        try:
+            app.open_log(f.name)
+            while not app.log_file.indexed:
+                time.sleep(0.01)
+
+            def reset_log_view():
+                app.applied_log = None
+
+            results["logs.render"] = measure(app.update_logs, reset_log_view, iterations)
+
+            search = None
+
+            def new_search():
+                nonlocal search
+                search = LogSearch(app.log_file, "status=0$")
+
+            results["logs.search_step"] = measure(lambda: search.step(), new_search, iterations)
+        finally:
+            os.unlink(f.name)
+    finally:
+        app.cleanup()
+
+    return {
+        "name": name,
+        "processes": processes,
+        "sockets": sockets,
+        "disks": disks,
+        "nics": nics,
+        "cpus": cpus,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+    }
+
+
+def git_revision():
+    """当前代码版本, 用于比较不同版本的结果"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyDEX-UI benchmarks")
+    parser.add_argument("--quick", action="store_true", help="run only the small scenarios")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--scenario", action="append", help="run only the named scenario(s)")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS[:2] if args.quick else SCENARIOS
+    if args.scenario:
+        scenarios = [s for s in SCENARIOS if s[0] in args.scenario]
+
+    module = load_app_module()
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "scenarios": [],
+    }
+    for scenario in scenarios:
+        print(f"Running scenario {scenario[0]}...", file=sys.stderr)
+        report["scenarios"].append(run_scenario(module, *scenario, args.iterations))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()